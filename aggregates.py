@@ -0,0 +1,184 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+
+
+# Running aggregates over the names data that can be extended one year at a time
+# For every (name, sex) it keeps the total count, the number of years the name appears in and the first
+# and last of those years; for every (year, sex) it keeps births, number of names and the letters of all the
+# babies' names added up
+# Adding rows costs time proportional to the rows added, not to the history already in the store
+class AggregateStore:
+    def __init__(self):
+        # (name, sex) -> slot in the per-name arrays
+        self.slots = {}
+        self.names = []
+        self.sexes = []
+
+        self.size = 0
+        self.total = np.zeros(0, dtype=np.int64)
+        self.appearances = np.zeros(0, dtype=np.int32)
+        self.first_year = np.zeros(0, dtype=np.int16)
+        self.last_year = np.zeros(0, dtype=np.int16)
+
+        # (year, sex) -> [births, names, letters of every baby's name]
+        self.yearly = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        store = cls()
+        store.add_rows(df)
+        return store
+
+    # Adds the rows of a names dataframe (columns year, name, sex, count) for years not yet in the store
+    def add_rows(self, df):
+        new_years = set(int(year) for year in pd.unique(df['year']))
+        known_years = set(self.years())
+        if new_years & known_years:
+            raise ValueError('Years already in the store: {}'.format(sorted(new_years & known_years)))
+
+        # State-level rows are summed over states first, so appearances and names still count years and names
+        if 'state' in df:
+            df = df.groupby(['year', 'name', 'sex'], observed=True, as_index=False)['count'].sum()
+
+        letter_count = df['name'].astype(str).str.len() if 'letter_count' not in df else df['letter_count']
+
+        # Collapse the new rows to one row per (name, sex) before touching the store
+        batch = pd.DataFrame({
+            'name': df['name'].astype(str),
+            'sex': df['sex'].astype(str),
+            'year': df['year'],
+            'count': df['count'],
+        })
+        per_name = batch.groupby(['name', 'sex']).agg(total=('count', 'sum'), appearances=('count', 'size'),
+                                                      first_year=('year', 'min'), last_year=('year', 'max'))
+
+        slots = np.array([self.slot(name, sex) for name, sex in per_name.index], dtype=np.int64)
+        np.add.at(self.total, slots, per_name['total'].to_numpy())
+        np.add.at(self.appearances, slots, per_name['appearances'].to_numpy())
+        np.minimum.at(self.first_year, slots, per_name['first_year'].to_numpy())
+        np.maximum.at(self.last_year, slots, per_name['last_year'].to_numpy())
+
+        batch['letters'] = np.asarray(letter_count, dtype=np.int64) * batch['count'].to_numpy()
+        per_year = batch.groupby(['year', 'sex']).agg(births=('count', 'sum'), names=('count', 'size'),
+                                                      letters=('letters', 'sum'))
+        for (year, sex), row in zip(per_year.index, per_year.itertuples(index=False)):
+            self.yearly[(int(year), sex)] = [int(row.births), int(row.names), int(row.letters)]
+
+    # Adds one SSA yobYYYY.txt file (lines of name,sex,count); the year is taken from the file name
+    def add_year_file(self, path):
+        self.add_rows(read_year_file(path))
+
+    # Slot for (name, sex), growing the per-name arrays for names seen for the first time
+    def slot(self, name, sex):
+        key = (name, sex)
+        if key in self.slots:
+            return self.slots[key]
+
+        if self.size == len(self.total):
+            self.grow(max(1024, 2 * self.size))
+
+        self.slots[key] = self.size
+        self.names.append(name)
+        self.sexes.append(sex)
+        self.size += 1
+
+        return self.size - 1
+
+    def grow(self, capacity):
+        extra = capacity - len(self.total)
+        self.total = np.concatenate([self.total, np.zeros(extra, dtype=np.int64)])
+        self.appearances = np.concatenate([self.appearances, np.zeros(extra, dtype=np.int32)])
+        self.first_year = np.concatenate([self.first_year, np.full(extra, np.iinfo(np.int16).max, dtype=np.int16)])
+        self.last_year = np.concatenate([self.last_year, np.full(extra, np.iinfo(np.int16).min, dtype=np.int16)])
+
+    # Sorted list of years in the store
+    def years(self):
+        return sorted(set(year for year, sex in self.yearly))
+
+    # Number of years from the first to the last year in the store
+    def year_span(self):
+        years = self.years()
+        if not years:
+            return 0
+
+        return years[-1] - years[0] + 1
+
+    # Per-(name, sex) aggregates as a dataframe
+    def name_frame(self):
+        size = self.size
+        return pd.DataFrame({
+            'name': self.names,
+            'sex': self.sexes,
+            'count': self.total[:size],
+            'appearances': self.appearances[:size],
+            'first_year': self.first_year[:size],
+            'last_year': self.last_year[:size],
+        })
+
+    # Per-(year, sex) aggregates as a dataframe, with the mean letter count of the babies born in each year
+    # (weighted by births like length_histogram, not averaged over distinct names)
+    def year_frame(self):
+        rows = [(year, sex, births, names, letters) for (year, sex), (births, names, letters) in self.yearly.items()]
+        df = pd.DataFrame(rows, columns=['year', 'sex', 'births', 'names', 'letters'])
+        df = df.sort_values(['year', 'sex']).reset_index(drop=True)
+        df['avg_letter_count'] = df['letters'] / df['births']
+        return df
+
+    # Alphabetical list of the names of one sex that appear in every year of the store's year span
+    def every_year_names(self, sex):
+        df = self.name_frame()
+        df = df[(df['sex'] == sex) & (df['appearances'] == self.year_span())]
+        return sorted(df['name'])
+
+    # The n names of one sex with the highest total count, numbered from 1 (ties alphabetically)
+    def top_names(self, sex, n=50):
+        df = self.name_frame()
+        df = df[df['sex'] == sex].sort_values(['count', 'name'], ascending=[False, True])[:n]
+        df = df[['name', 'count']].reset_index(drop=True)
+        df.index = df.index + 1
+        return df
+
+    def save(self, path):
+        year_keys = list(self.yearly)
+        np.savez(path,
+                 names=np.array(self.names, dtype=str), sexes=np.array(self.sexes, dtype=str),
+                 total=self.total[:self.size], appearances=self.appearances[:self.size],
+                 first_year=self.first_year[:self.size], last_year=self.last_year[:self.size],
+                 yearly_years=np.array([year for year, sex in year_keys], dtype=np.int16),
+                 yearly_sexes=np.array([sex for year, sex in year_keys], dtype=str),
+                 yearly_totals=np.array([self.yearly[key] for key in year_keys], dtype=np.int64).reshape(-1, 3))
+
+    # Stores saved before letters were weighted by births kept them as yearly_values and fail to load here
+    @classmethod
+    def load(cls, path):
+        store = cls()
+        with np.load(path) as data:
+            store.names = data['names'].tolist()
+            store.sexes = data['sexes'].tolist()
+            store.slots = {key: i for i, key in enumerate(zip(store.names, store.sexes))}
+            store.size = len(store.names)
+            store.total = data['total'].copy()
+            store.appearances = data['appearances'].copy()
+            store.first_year = data['first_year'].copy()
+            store.last_year = data['last_year'].copy()
+            for year, sex, values in zip(data['yearly_years'], data['yearly_sexes'], data['yearly_totals']):
+                store.yearly[(int(year), str(sex))] = [int(value) for value in values]
+
+        return store
+
+
+# Reads one SSA yobYYYY.txt file into a names dataframe (columns year, name, sex, count)
+def read_year_file(path):
+    year = int(os.path.basename(path)[3:7])
+    df = pd.read_csv(path, names=['name', 'sex', 'count'], dtype={'name': str, 'sex': str, 'count': np.int32})
+    df.insert(0, 'year', np.int16(year))
+    return df
+
+
+# Returns the aggregate store for this dataframe, building it on first use
+def name_aggregates(df):
+    return cached_for_frame(df, 'aggregates', AggregateStore.from_frame)
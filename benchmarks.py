@@ -0,0 +1,139 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import tracemalloc
+from unittest import mock
+
+import pandas as pd
+
+import main as analyses
+from results_cache import RESULTS_CACHE
+from synthetic import REAL_ROWS, synthetic_names
+
+
+BASELINE_PATH = 'benchmark_baseline.json'
+
+# A function counts as regressed when its warm time exceeds the baseline by more than this fraction
+# and by more than MIN_SLOWDOWN seconds, so timer noise on sub-millisecond calls is not reported
+TOLERANCE = 0.25
+MIN_SLOWDOWN = 0.005
+
+# Analyses to benchmark, as (label, function name in main.py, extra arguments after df)
+BENCHMARKS = [
+    ('longest_names', 'longest_names', ()),
+    ('plot_team_names', 'plot_team_names', ()),
+    ('most_popular_name', 'most_popular_name', ()),
+    ('aggregate_names_by_cent', 'aggregate_names_by_cent', ()),
+    ('names_by_cent', 'names_by_cent', ()),
+    ('popular_names_1985_2000', 'popular_names_1985_2000', ()),
+    ('popular_names_2000_2015', 'popular_names_2000_2015', ()),
+    ('pop_culture_name', 'pop_culture_name', ('Maverick', 1986, 'black')),
+]
+
+
+# Stands in for matplotlib.pyplot and DataFrame.plot so benchmarks time the analysis, not the drawing
+class NoPlot:
+    def __call__(self, *args, **kwargs):
+        return None
+
+    def __getattr__(self, name):
+        return self
+
+
+# Also turns off the results cache, so warm runs time the analysis rather than a pickle load
+@contextlib.contextmanager
+def plotting_stubbed():
+    with mock.patch.object(analyses, 'plt', NoPlot()), mock.patch.object(pd.DataFrame, 'plot', NoPlot()), \
+            mock.patch.object(analyses, 'plot_lines', NoPlot()), mock.patch.object(RESULTS_CACHE, 'enabled', False), \
+            contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# Times one analysis on df
+# cold: first call on a fresh copy of df, so it includes building the shared matrix/indexes it needs
+# warm: best of repeat further calls on that copy, once those structures are cached
+# peak_mb: peak memory traced during a separate cold call
+def run_benchmark(df, function, args, repeat=3):
+    function = getattr(analyses, function)
+
+    with plotting_stubbed():
+        frame = df.copy()
+        start = time.perf_counter()
+        function(frame, *args)
+        cold = time.perf_counter() - start
+
+        warm = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            function(frame, *args)
+            warm.append(time.perf_counter() - start)
+
+        frame = df.copy()
+        tracemalloc.start()
+        function(frame, *args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {'cold_seconds': cold, 'warm_seconds': min(warm), 'peak_mb': peak / 1e6}
+
+
+# Runs every benchmark at every scale and returns {'<label>@<scale>x': result}
+def run_benchmarks(scales, repeat=3):
+    results = {}
+    for scale in scales:
+        df = synthetic_names(scale)
+        print('Scale {}x: {} rows ({:.1f}x the real row count)'.format(scale, len(df), len(df) / REAL_ROWS))
+
+        for label, function, args in BENCHMARKS:
+            result = run_benchmark(df, function, args, repeat)
+            result['rows'] = len(df)
+            results['{}@{}x'.format(label, scale)] = result
+            print('  {:<28} cold {:>8.4f}s  warm {:>8.4f}s  peak {:>9.1f} MB'.format(
+                label, result['cold_seconds'], result['warm_seconds'], result['peak_mb']))
+
+    return results
+
+
+# Compares results with a saved baseline and returns the keys whose warm time regressed
+def compare_with_baseline(results, baseline, tolerance=TOLERANCE):
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+
+        before = baseline[key]['warm_seconds']
+        after = result['warm_seconds']
+        change = (after - before) / before if before else 0.0
+        flag = 'REGRESSION' if change > tolerance and after - before > MIN_SLOWDOWN else ''
+        print('{:<36} {:>8.4f}s -> {:>8.4f}s  {:>+7.1%}  {}'.format(key, before, after, change, flag))
+        if flag:
+            regressions.append(key)
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the analyses in main.py on synthetic SSA-shaped data.')
+    parser.add_argument('--scales', default='1,10',
+                        help='comma-separated multiples of the real row count (10x peaks at about 2.5 GB of memory '
+                             'and memory grows with the rows, so 100x needs a machine with 32 GB or more)')
+    parser.add_argument('--repeat', type=int, default=3, help='warm runs per benchmark')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline results file')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    args = parser.parse_args()
+
+    results = run_benchmarks([float(scale) if '.' in scale else int(scale) for scale in args.scales.split(',')],
+                             args.repeat)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print('Saved baseline to {}'.format(args.baseline))
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(results, json.load(f))
+        if regressions:
+            raise SystemExit('{} benchmark(s) regressed: {}'.format(len(regressions), ', '.join(regressions)))
@@ -0,0 +1,182 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from loader import DATASET_PATH, load_names
+from name_matrix import name_matrix
+
+
+IMPACT_COLUMNS = ['name', 'event_year', 'pre_mean', 'post_mean', 'growth', 'expected', 'lift', 'z', 'p_value']
+
+# Names are scanned for change points this many columns at a time, which bounds the memory the scan needs
+SCAN_CHUNK = 4096
+
+
+# Pre/post event statistics for many (year row, column) pairs of a year x column matrix of counts at once
+# event_rows and cols are integer arrays of the same (or broadcastable) shape; the event year starts the post window,
+# the pre window is the window years before it. Every window sum is a difference of two cumulative sums, so the
+# cost does not depend on the window length
+# growth: (post mean + 1) / (pre mean + 1)
+# expected: post mean predicted by a straight line fitted to the pre window, lift: (post mean + 1) / (expected + 1)
+# z: how far the post mean is above expected, in standard errors (pre window scatter around the line plus Poisson
+# noise at the larger of the two means), p_value: its one-sided normal tail probability
+# Pairs with fewer than 3 pre years or no post years get NaN
+def impact_stats(values, event_rows, cols, window):
+    values = values.astype(np.float64)
+    n_years = values.shape[0]
+    t = np.arange(n_years, dtype=np.float64)[:, None]
+    zero = np.zeros((1, values.shape[1]))
+    sums = np.vstack([zero, np.cumsum(values, axis=0)])
+    time_sums = np.vstack([zero, np.cumsum(t * values, axis=0)])
+    square_sums = np.vstack([zero, np.cumsum(values ** 2, axis=0)])
+
+    event_rows, cols = np.broadcast_arrays(event_rows, cols)
+    valid = (event_rows >= 0) & (event_rows < n_years)
+    event = np.clip(event_rows, 0, n_years)
+    start = np.maximum(event - window, 0)
+    stop = np.minimum(event + window, n_years)
+    n_pre = (event - start).astype(np.float64)
+    n_post = (stop - event).astype(np.float64)
+    valid &= (n_pre >= 3) & (n_post >= 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pre_sum = sums[event, cols] - sums[start, cols]
+        post_sum = sums[stop, cols] - sums[event, cols]
+        pre_mean = pre_sum / n_pre
+        post_mean = post_sum / n_post
+
+        # Least squares line through the pre window, from the sums of t, t^2, y, t*y and y^2
+        sum_t = (start + event - 1) * n_pre / 2
+        sum_tt = square_total(event) - square_total(start)
+        sxx = sum_tt - sum_t ** 2 / n_pre
+        sxy = time_sums[event, cols] - time_sums[start, cols] - sum_t * pre_sum / n_pre
+        syy = square_sums[event, cols] - square_sums[start, cols] - pre_sum ** 2 / n_pre
+        slope = sxy / sxx
+        intercept = pre_mean - slope * sum_t / n_pre
+
+        expected = np.maximum(intercept + slope * (event + stop - 1) / 2, 0)
+        residual_variance = np.where(n_pre > 2, np.maximum(syy - slope * sxy, 0) / (n_pre - 2), 0)
+        poisson_variance = np.maximum(np.maximum(expected, post_mean), 1)
+        z = (post_mean - expected) / np.sqrt((residual_variance + poisson_variance) / n_post)
+
+    stats = {
+        'pre_mean': pre_mean,
+        'post_mean': post_mean,
+        'growth': (post_mean + 1) / (pre_mean + 1),
+        'expected': expected,
+        'lift': (post_mean + 1) / (expected + 1),
+        'z': z,
+        'p_value': 0.5 * erfc(z / np.sqrt(2)),
+        'post_sum': post_sum,
+    }
+    return {key: np.where(valid, value, np.nan) for key, value in stats.items()}
+
+
+# Sum of t^2 for t in 0 .. n - 1
+def square_total(n):
+    n = np.asarray(n, dtype=np.float64)
+    return (n - 1) * n * (2 * n - 1) / 6
+
+
+# Complementary error function for arrays (Abramowitz and Stegun 7.1.26, absolute error below 1.5e-7)
+def erfc(x):
+    x = np.asarray(x, dtype=np.float64)
+    a = np.abs(x)
+    t = 1 / (1 + 0.3275911 * a)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    result = poly * np.exp(-a ** 2)
+    return np.where(x >= 0, result, 2 - result)
+
+
+# Year x name counts for one sex, or for both added up when sex is None
+def sex_total(matrix, sex):
+    counts = matrix.sex_counts(sex)
+    return counts.sum(axis=0) if sex is None else counts
+
+
+# Impact of events on names, for any number of (name, event_year) pairs (a list of pairs or a dataframe with
+# name and event_year columns), ranked by z, most significant rise first
+# The post window starts in the event year; sex=None adds up both sexes
+def event_impact(df, events, window=5, sex=None):
+    if isinstance(events, pd.DataFrame):
+        names, event_years = list(events['name']), events['event_year'].to_numpy()
+    else:
+        names = [name for name, year in events]
+        event_years = np.array([year for name, year in events])
+
+    matrix = name_matrix(df)
+    missing = sorted(set(name for name in names if name not in matrix.columns))
+    if missing:
+        raise KeyError('Names not in dataset: {}'.format(', '.join(missing)))
+
+    # Only the columns of the names asked about are read
+    cols = np.array([matrix.columns[name] for name in names], dtype=np.intp)
+    unique_cols, local_cols = np.unique(cols, return_inverse=True)
+    values = sex_total(matrix, sex)[:, unique_cols]
+    event_rows = np.asarray(event_years, dtype=np.intp) - int(matrix.years[0])
+
+    stats = impact_stats(values, event_rows, local_cols.reshape(-1), window)
+    impact_df = pd.DataFrame({'name': names, 'event_year': event_years})
+    for column in IMPACT_COLUMNS[2:]:
+        impact_df[column] = stats[column]
+
+    return impact_df.sort_values('z', ascending=False, na_position='last').reset_index(drop=True)
+
+
+# Scans every name for the year its counts rose furthest above their trend
+# Every year with full pre and post windows is tried as the event year of every name, a block of names at a time,
+# and each name keeps its best year; names with fewer than min_count births in that post window are left out
+# Returns the k names with the highest z, with the same columns as event_impact
+def scan_change_points(df, window=5, sex=None, min_count=100, k=50):
+    matrix = name_matrix(df)
+    counts = sex_total(matrix, sex)
+    n_years = len(matrix.years)
+    event_rows = np.arange(max(window, 3), n_years - window + 1)[:, None]
+
+    best = []
+    for first in range(0, len(matrix.names), SCAN_CHUNK):
+        cols = np.arange(min(SCAN_CHUNK, len(matrix.names) - first))[None, :]
+        stats = impact_stats(counts[:, first:first + cols.shape[1]], event_rows, cols, window)
+
+        z = np.where(stats['post_sum'] >= min_count, stats['z'], np.nan)
+        z = np.where(np.isnan(z), -np.inf, z)
+        best_rows = z.argmax(axis=0)
+        picked = cols[0]
+        keep = np.isfinite(z[best_rows, picked])
+
+        chunk_df = pd.DataFrame({
+            'name': np.asarray(matrix.names, dtype=object)[first + picked[keep]],
+            'event_year': matrix.years[event_rows[best_rows[keep], 0]],
+        })
+        for column in IMPACT_COLUMNS[2:]:
+            chunk_df[column] = stats[column][best_rows[keep], picked[keep]]
+        best.append(chunk_df)
+
+    scan_df = pd.concat(best, ignore_index=True) if best else pd.DataFrame(columns=IMPACT_COLUMNS)
+    return scan_df.sort_values(['z', 'name'], ascending=[False, True]).head(k).reset_index(drop=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Screen names for rises in popularity after events.')
+    parser.add_argument('events', nargs='*', metavar='NAME:YEAR',
+                        help='name and event year pairs such as Maverick:1986 (default: scan every name)')
+    parser.add_argument('--window', type=int, default=5, help='years before and after the event to compare')
+    parser.add_argument('--sex', choices=['M', 'F'], help='only count babies of this sex')
+    parser.add_argument('--min-count', type=int, default=100, help='scan: births needed in the post window')
+    parser.add_argument('--top', type=int, default=50, help='scan: names to list')
+    parser.add_argument('--data', default=DATASET_PATH, help='path to the Excel dataset')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    df = load_names(args.data)
+
+    if args.events:
+        events = [(event.rsplit(':', 1)[0], int(event.rsplit(':', 1)[1])) for event in args.events]
+        result_df = event_impact(df, events, args.window, args.sex)
+    else:
+        result_df = scan_change_points(df, args.window, args.sex, args.min_count, args.top)
+
+    print(result_df.to_string(float_format='{:.3f}'.format))
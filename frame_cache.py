@@ -0,0 +1,38 @@
+import threading
+import weakref
+
+
+# Structures derived from a names dataframe (count matrix, indexes, period columns, ...), keyed by id(df)
+# Each entry holds a weak reference to its dataframe and is dropped when that dataframe is garbage collected
+_caches = {}
+
+# Guards _caches; each structure also gets its own lock while it is built, so threads asking for the same
+# structure wait for one build while different structures can be built at the same time
+_lock = threading.Lock()
+_build_locks = {}
+
+
+# Returns the structure stored under key for this dataframe, building it with build(df) on first use
+# Derived structures assume the year/name/sex/count columns are not modified after they are built
+def cached_for_frame(df, key, build):
+    with _lock:
+        entry = _caches.get(id(df))
+        if entry is None or entry[0]() is not df:
+            entry = (weakref.ref(df), {})
+            _caches[id(df)] = entry
+            weakref.finalize(df, _caches.pop, id(df), None)
+
+        values = entry[1]
+        if key in values:
+            return values[key]
+
+        build_lock = _build_locks.setdefault((id(df), key), threading.Lock())
+
+    with build_lock:
+        if key not in values:
+            values[key] = build(df)
+
+    with _lock:
+        _build_locks.pop((id(df), key), None)
+
+    return values[key]
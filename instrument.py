@@ -0,0 +1,127 @@
+import cProfile
+import csv
+import json
+import os
+import re
+import time
+import tracemalloc
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+
+REPORT_FIELDS = ['stage', 'wall_seconds', 'cpu_seconds', 'peak_mb', 'rows_in', 'rows_out']
+
+
+# Opt-in per-stage instrumentation for main()
+# run() calls a stage and, when enabled, records its wall time, CPU time, peak traced memory (tracemalloc)
+# and the rows going in and out; every plt.show() inside a stage is recorded as its own figure render stage
+# With cprofile_dir set, each stage's cProfile stats are dumped there as <number>_<stage>.prof
+# When disabled, run() only calls the function
+class Profiler:
+    def __init__(self, enabled=True, cprofile_dir=None):
+        self.enabled = enabled
+        self.cprofile_dir = cprofile_dir
+        self.records = []
+        self.stages = 0
+
+    def run(self, function, *args, **kwargs):
+        if not self.enabled:
+            return function(*args, **kwargs)
+
+        stage = stage_name(function, args, kwargs)
+        record = {'stage': stage, 'rows_in': row_count(args[0]) if args else None}
+        self.stages += 1
+        number = self.stages
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        memory_start = tracemalloc.get_traced_memory()[0]
+
+        profile = cProfile.Profile() if self.cprofile_dir else None
+        show = plt.show
+        plt.show = self.timed_show(stage, show)
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            if profile:
+                profile.enable()
+            result = function(*args, **kwargs)
+        finally:
+            if profile:
+                profile.disable()
+            plt.show = show
+
+        record['wall_seconds'] = time.perf_counter() - wall_start
+        record['cpu_seconds'] = time.process_time() - cpu_start
+        record['peak_mb'] = (tracemalloc.get_traced_memory()[1] - memory_start) / 1e6
+        record['rows_out'] = row_count(result)
+        self.records.append(record)
+
+        if profile:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+            file_name = '{:02d}_{}.prof'.format(number, re.sub(r'\W+', '_', stage).strip('_'))
+            profile.dump_stats(os.path.join(self.cprofile_dir, file_name))
+
+        return result
+
+    # Wraps plt.show so drawing the current figure is timed as a stage of its own before it is shown
+    # Only drawing is timed; an interactive window stays open for as long as the user keeps it
+    def timed_show(self, stage, show):
+        def timed(*args, **kwargs):
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            plt.gcf().canvas.draw()
+            self.records.append({
+                'stage': '{} figure render'.format(stage),
+                'wall_seconds': time.perf_counter() - wall_start,
+                'cpu_seconds': time.process_time() - cpu_start,
+                'peak_mb': None,
+                'rows_in': None,
+                'rows_out': None,
+            })
+            return show(*args, **kwargs)
+
+        return timed
+
+    # Writes the records as CSV when path ends in .csv, as JSON otherwise
+    def write_report(self, path):
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.records)
+        else:
+            with open(path, 'w') as f:
+                json.dump(self.records, f, indent=2)
+
+    def summary(self):
+        df = pd.DataFrame(self.records, columns=REPORT_FIELDS)
+        df[['rows_in', 'rows_out']] = df[['rows_in', 'rows_out']].astype('Int64')
+        stages = df[~df['stage'].str.endswith('figure render')]
+
+        print('\nStage timings (slowest first):')
+        print(df.sort_values('wall_seconds', ascending=False).to_string(index=False, float_format='{:.3f}'.format))
+        print('\nTotal: {:.3f}s wall, {:.3f}s CPU'.format(stages['wall_seconds'].sum(), stages['cpu_seconds'].sum()))
+
+
+# Stage label such as "pop_culture_name('Maverick', 1986, 'black')"; dataframes are left out of the arguments
+def stage_name(function, args, kwargs=None):
+    shown = [repr(arg) for arg in args if not isinstance(arg, (pd.DataFrame, pd.Series))]
+    shown += ['{}={!r}'.format(name, value) for name, value in (kwargs or {}).items()]
+    if not shown:
+        return function.__name__
+
+    return '{}({})'.format(function.__name__, ', '.join(shown))
+
+
+# Number of rows in a dataframe/Series or in a list or tuple of them; None for anything else
+def row_count(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, (list, tuple)) and all(isinstance(item, (pd.DataFrame, pd.Series)) for item in value):
+        return sum(len(item) for item in value)
+
+    return None
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+from name_matrix import encode
+
+
+PERCENTILES = [10, 25, 50, 75, 90]
+
+
+# Births by year and name length, split by sex
+# counts[s, y, l] is the number of babies of sex sexes[s] born in years[y] whose name has l letters
+# Every statistic below reads this histogram, so each baby counts once however its name is spelled
+class LengthHistogram:
+    def __init__(self, years, sexes, counts):
+        self.years = years
+        self.sexes = sexes
+        self.counts = counts
+
+    # year x length births for one sex, or for both added up when sex is None
+    def sex_counts(self, sex):
+        if sex is None:
+            return self.counts.sum(axis=0)
+
+        return self.counts[self.sexes.index(sex)]
+
+    # Mean name length of the babies born in each year, as a Series indexed by year
+    def mean(self, sex=None):
+        counts = self.sex_counts(sex)
+        lengths = np.arange(counts.shape[1])
+        with np.errstate(invalid='ignore'):
+            values = (counts * lengths).sum(axis=1) / counts.sum(axis=1)
+
+        return pd.Series(values, index=pd.Index(self.years, name='year'), name='avg_letter_count')
+
+    # Name length percentiles of the babies born in each year, as a year x percentile dataframe
+    # Each value is the shortest length that at least that percentage of the year's babies have or fall below
+    def percentiles(self, percentiles=PERCENTILES, sex=None):
+        counts = self.sex_counts(sex)
+        cumulative = counts.cumsum(axis=1)
+        totals = cumulative[:, -1:]
+
+        values = np.column_stack([
+            (cumulative * 100 < totals * percentile).sum(axis=1) for percentile in percentiles
+        ]).astype(np.float64)
+        values[totals[:, 0] == 0] = np.nan
+
+        return pd.DataFrame(values, index=pd.Index(self.years, name='year'),
+                            columns=pd.Index(list(percentiles), name='percentile'))
+
+    def median(self, sex=None):
+        return self.percentiles([50], sex)[50].rename('median_letter_count')
+
+    # Mean and percentiles per year, one row per year (and per sex when by_sex is set)
+    def summary(self, by_sex=False):
+        frames = []
+        for sex in (self.sexes if by_sex else [None]):
+            df = self.percentiles(sex=sex)
+            df.columns = ['p{}'.format(percentile) for percentile in df.columns]
+            df.insert(0, 'mean', self.mean(sex))
+            if by_sex:
+                df.insert(0, 'sex', sex)
+            frames.append(df.reset_index())
+
+        return pd.concat(frames, ignore_index=True)
+
+
+def build_length_histogram(df):
+    sex_codes, sexes = encode(df['sex'])
+    year = df['year'].to_numpy()
+    first_year = int(year.min())
+    years = np.arange(first_year, int(year.max()) + 1)
+
+    letter_count = df['letter_count'].to_numpy().astype(np.int64)
+    width = int(letter_count.max()) + 1
+
+    # One bincount over a flat (sex, year, length) index, weighted by the births on each row
+    index = (sex_codes.astype(np.int64) * len(years) + (year - first_year)) * width + letter_count
+    counts = np.bincount(index, weights=df['count'].to_numpy(), minlength=len(sexes) * len(years) * width)
+
+    return LengthHistogram(years, sexes, counts.astype(np.int64).reshape(len(sexes), len(years), width))
+
+
+# Returns the year x length histogram for this dataframe, building it on first use
+def length_histogram(df):
+    return cached_for_frame(df, 'length_histogram', build_length_histogram)
+
+
+# Every distinct name in the data with its length, longest first (names of equal length alphabetically)
+# Lengths are read per name code, so the cost depends on the number of names rather than rows
+def length_ranking(df):
+    name_codes, names = encode(df['name'])
+    present = np.bincount(name_codes, minlength=len(names)) > 0
+
+    lengths = np.zeros(len(names), dtype=np.int64)
+    lengths[name_codes] = df['letter_count'].to_numpy()
+
+    codes = np.flatnonzero(present)
+    codes = codes[np.argsort(-lengths[codes], kind='stable')]
+
+    return pd.DataFrame({'name': np.asarray(names, dtype=object)[codes], 'letter_count': lengths[codes]})
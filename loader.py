@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+DATASET_PATH = 'Baby Names Dataset.xlsx'
+CACHE_DIR = '.names_cache'
+
+# The SSA state-level data as one CSV file without a header, e.g. cat namesbystate/*.TXT > namesbystate.csv
+# Its cache lives apart from the national one so switching between them does not rebuild either
+STATE_COLUMNS = ['state', 'sex', 'year', 'name', 'count']
+STATE_CACHE_DIR = os.path.join(CACHE_DIR, 'state')
+STATE_FILES = ['state_codes', 'states']
+
+# Bump whenever the on-disk layout of the cache changes so stale caches get rebuilt
+CACHE_VERSION = 2
+
+
+# Loads the names dataset with columns ['year', 'name', 'sex', 'count', 'letter_count']
+# states=True reads path as the state-level data (see STATE_COLUMNS), which adds a 'state' column
+# The first run parses the source file and writes each column to a .npy file in cache_dir,
+# later runs memory-map those files instead of parsing the workbook again
+# With compact=True (the default) the frame uses the compact schema described in frame_from_columns
+# cache_dir defaults to CACHE_DIR, or STATE_CACHE_DIR for the state-level data
+# letter_count=False leaves the letter_count column out, for callers that derive it later with add_letter_count
+def load_names(path=DATASET_PATH, cache_dir=None, compact=True, verbose=True, states=False, letter_count=True):
+    start = time.perf_counter()
+    if cache_dir is None:
+        cache_dir = STATE_CACHE_DIR if states else CACHE_DIR
+
+    if cache_is_fresh(path, cache_dir, states):
+        load_kind = 'warm'
+    else:
+        build_cache(path, cache_dir, states)
+        load_kind = 'cold'
+
+    df = frame_from_columns(read_columns(cache_dir), compact=compact, letter_count=letter_count)
+
+    if verbose:
+        print('Loaded {} rows ({} load) in {:.3f}s'.format(len(df), load_kind, time.perf_counter() - start))
+
+    return df
+
+
+# Parses the source file and writes one .npy file per column plus a meta.json describing the source file
+# Names, sexes and states are stored as integer codes into sorted vocabularies so every file can be memory-mapped
+def build_cache(path=DATASET_PATH, cache_dir=CACHE_DIR, states=False):
+    df = read_source(path, states)
+
+    name_codes, names = pd.factorize(df['name'], sort=True)
+    sex_codes, sexes = pd.factorize(df['sex'], sort=True)
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # meta.json is written last, so a partially written cache is never considered fresh
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    columns = {
+        'year': df['year'].to_numpy(dtype=np.int16),
+        'name_codes': name_codes.astype(np.int32),
+        'names': np.asarray(names, dtype=str),
+        'sex_codes': sex_codes.astype(np.int8),
+        'sexes': np.asarray(sexes, dtype=str),
+        'count': df['count'].to_numpy(dtype=np.int32),
+    }
+    if 'state' in df:
+        state_codes, state_labels = pd.factorize(df['state'], sort=True)
+        columns['state_codes'] = state_codes.astype(np.int8)
+        columns['states'] = np.asarray(state_labels, dtype=str)
+
+    for column in STATE_FILES:
+        if column not in columns and os.path.exists(os.path.join(cache_dir, column + '.npy')):
+            os.remove(os.path.join(cache_dir, column + '.npy'))
+    for column, values in columns.items():
+        np.save(os.path.join(cache_dir, column + '.npy'), values)
+
+    meta = source_stamp(path)
+    meta['sha256'] = file_sha256(path)
+    meta['version'] = CACHE_VERSION
+    meta['rows'] = len(df)
+    meta['states'] = states
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+
+# Reads the national Excel workbook, or the state-level CSV with states=True
+def read_source(path, states=False):
+    if states:
+        return pd.read_csv(path, names=STATE_COLUMNS, header=None,
+                           dtype={'state': str, 'sex': str, 'year': np.int16, 'name': str, 'count': np.int32})
+
+    df = pd.read_excel(path)
+    df.columns = ['year', 'name', 'sex', 'count']
+    return df
+
+
+# Checks whether the cache in cache_dir was built from the current version of the source file, read as the
+# national (states=False) or state-level data
+# A matching mtime and size is trusted as-is; if only the mtime moved, the content hash decides
+def cache_is_fresh(path=DATASET_PATH, cache_dir=CACHE_DIR, states=False):
+    meta_path = os.path.join(cache_dir, 'meta.json')
+    if not os.path.exists(meta_path):
+        return False
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    if meta.get('version') != CACHE_VERSION or meta.get('states', False) != states:
+        return False
+
+    stamp = source_stamp(path)
+    if stamp['size'] != meta['size']:
+        return False
+    if stamp['mtime_ns'] == meta['mtime_ns']:
+        return True
+
+    # The file was touched or copied; keep the cache if its contents did not change
+    if file_sha256(path) != meta['sha256']:
+        return False
+
+    meta['mtime_ns'] = stamp['mtime_ns']
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    return True
+
+
+# Memory-maps every cached column (the state columns only exist for the state-level data)
+def read_columns(cache_dir=CACHE_DIR):
+    columns = {}
+    for column in ['year', 'name_codes', 'names', 'sex_codes', 'sexes', 'count'] + STATE_FILES:
+        column_path = os.path.join(cache_dir, column + '.npy')
+        if column in STATE_FILES and not os.path.exists(column_path):
+            continue
+        columns[column] = np.load(column_path, mmap_mode='r')
+
+    return columns
+
+
+# Rebuilds the names dataframe from the cached columns
+# letter_count is computed once per distinct name and broadcast to the rows through the name codes
+# The compact schema stores name and sex as categoricals over the cached vocabularies, year as int16,
+# count as int32 and letter_count as uint8; compact=False gives the original object/int64 frame
+# State-level columns get a 'state' column after sex, categorical in the compact schema
+# A 'letter_count' column in columns is used as is; copy=False makes the compact frame a view of the columns
+def frame_from_columns(columns, compact=True, copy=True, letter_count=True):
+    names = columns['names']
+    name_codes = np.asarray(columns['name_codes'])
+    sex_codes = np.asarray(columns['sex_codes'])
+
+    if not compact:
+        df = pd.DataFrame({
+            'year': np.asarray(columns['year'], dtype=np.int64),
+            'name': names[name_codes].astype(object),
+            'sex': columns['sexes'][sex_codes].astype(object),
+            'count': np.asarray(columns['count'], dtype=np.int64),
+        })
+        if 'state_codes' in columns:
+            df.insert(3, 'state', columns['states'][np.asarray(columns['state_codes'])].astype(object))
+        if letter_count:
+            df['letter_count'] = letter_counts(columns, names, name_codes).astype(np.int64)
+        return df
+
+    frame_columns = {
+        'year': np.asarray(columns['year'], dtype=np.int16),
+        'name': pd.Categorical.from_codes(name_codes, categories=pd.Index(names, dtype=object)),
+        'sex': pd.Categorical.from_codes(sex_codes, categories=pd.Index(columns['sexes'], dtype=object)),
+        'count': np.asarray(columns['count'], dtype=np.int32),
+    }
+    if letter_count:
+        frame_columns['letter_count'] = np.asarray(letter_counts(columns, names, name_codes), dtype=np.uint8)
+    if 'state_codes' in columns:
+        frame_columns['state'] = pd.Categorical.from_codes(np.asarray(columns['state_codes']),
+                                                           categories=pd.Index(columns['states'], dtype=object))
+
+    order = ['year', 'name', 'sex', 'state', 'count', 'letter_count']
+    df = pd.DataFrame({column: frame_columns[column] for column in order if column in frame_columns}, copy=copy)
+
+    return df
+
+
+# The letter_count column: the stored one when columns has it, otherwise each name's length broadcast to its rows
+def letter_counts(columns, names, name_codes):
+    if 'letter_count' in columns:
+        return np.asarray(columns['letter_count'])
+
+    return np.char.str_len(names)[name_codes]
+
+
+# Adds the letter_count column to a frame loaded with letter_count=False (compact or not) and returns it
+def add_letter_count(df):
+    if isinstance(df['name'].dtype, pd.CategoricalDtype):
+        names, name_codes = np.asarray(df['name'].cat.categories, dtype=str), df['name'].cat.codes.to_numpy()
+        df['letter_count'] = letter_counts({}, names, name_codes).astype(np.uint8)
+    else:
+        name_codes, names = pd.factorize(df['name'])
+        df['letter_count'] = letter_counts({}, np.asarray(names, dtype=str), name_codes).astype(np.int64)
+
+    return df
+
+
+# Total memory held by a dataframe in bytes, including the strings behind object columns
+def frame_memory(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+# Reports how long a cold load (parsing the workbook) and a warm load (reading the cache) take
+def report_load_times(path=DATASET_PATH, cache_dir=CACHE_DIR):
+    start = time.perf_counter()
+    build_cache(path, cache_dir)
+    frame_from_columns(read_columns(cache_dir))
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_names(path, cache_dir, verbose=False)
+    warm = time.perf_counter() - start
+
+    print('Cold load (Excel): {:.3f}s'.format(cold))
+    print('Warm load (cache): {:.3f}s'.format(warm))
+    print('Speedup: {:.1f}x'.format(cold / warm))
+
+
+# Reports the memory held by the original object/int64 frame and by the compact frame
+def report_memory(path=DATASET_PATH, cache_dir=CACHE_DIR):
+    before = frame_memory(load_names(path, cache_dir, compact=False, verbose=False))
+    after = frame_memory(load_names(path, cache_dir, compact=True, verbose=False))
+
+    print('Original frame: {:.1f} MB'.format(before / 1e6))
+    print('Compact frame: {:.1f} MB'.format(after / 1e6))
+    print('Reduction: {:.1f}x'.format(before / after))
+
+
+if __name__ == '__main__':
+    report_load_times()
+    report_memory()
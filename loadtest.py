@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from service import HOST, PORT
+
+
+# Request targets in the proportions the dashboards send them; {year}, {start} and {k} are filled in per request
+QUERIES = [
+    '/series?names=Michael,Christopher,Jessica,Ashley,Matthew&start={start}&end={end}',
+    '/top?year={year}&k={k}',
+    '/top?year={year}&k={k}&sex=F',
+    '/periods?by=sex',
+    '/periods?by=name&names=Mary,Elizabeth,Patricia,Jennifer,Linda',
+]
+
+
+# Fills in a random query; with repeat set every request uses the same values, so all but the first are cache hits
+def make_target(rng, repeat):
+    template = QUERIES[rng.randrange(len(QUERIES))]
+    if repeat:
+        return template.format(year=2000, start=1985, end=2000, k=10)
+
+    start = rng.randrange(1880, 2000)
+    return template.format(year=rng.randrange(1880, 2016), start=start, end=start + 15, k=rng.randrange(5, 51))
+
+
+# One keep-alive connection sending requests back to back until the deadline; returns each request's latency
+async def client(host, port, deadline, rng, repeat):
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies = []
+    errors = 0
+
+    try:
+        while time.perf_counter() < deadline:
+            target = make_target(rng, repeat)
+            start = time.perf_counter()
+            writer.write('GET {} HTTP/1.1\r\nHost: {}\r\n\r\n'.format(target, host).encode())
+            await writer.drain()
+
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+
+            latencies.append(time.perf_counter() - start)
+            if status_line.split()[1] != b'200':
+                errors += 1
+    finally:
+        writer.close()
+
+    return latencies, errors
+
+
+async def run_load(host, port, connections, seconds, repeat, seed):
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        client(host, port, deadline, random.Random(seed + i), repeat) for i in range(connections)
+    ])
+    elapsed = time.perf_counter() - start
+
+    latencies = np.concatenate([np.array(latencies) for latencies, errors in results]) * 1000
+    errors = sum(errors for latencies, errors in results)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else float('nan'),
+        'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else float('nan'),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load-test a running service.py and report latency and throughput.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--connections', type=int, default=16, help='concurrent keep-alive connections')
+    parser.add_argument('--seconds', type=float, default=10.0, help='how long to send requests')
+    parser.add_argument('--repeat', action='store_true', help='send identical queries to measure cache hits only')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(args.host, args.port, args.connections, args.seconds, args.repeat, args.seed))
+    print('{requests} requests ({errors} errors) in {seconds:.1f}s with {connections} connections'.format(
+        seconds=args.seconds, connections=args.connections, **result))
+    print('throughput {:.0f} requests/s, p50 {:.2f} ms, p99 {:.2f} ms'.format(
+        result['throughput'], result['p50_ms'], result['p99_ms']))
@@ -1,114 +1,127 @@
+import argparse
+
 import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
+
+from aggregates import name_aggregates
+from instrument import Profiler
+from lengths import length_histogram, length_ranking
+from loader import add_letter_count, load_names
+from name_index import name_index
+from name_matrix import name_matrix, yearly_counts
+from periods import CENTURIES, totals_by_period
+from plotting import plot_lines
+from presence import sustained_names
+from ranks import SEX_COLORS, rank_table
+from results_cache import RESULTS_CACHE, cached_call
 
 
 # As it stands, this program will generate 13 graphs and console output that might be hard to decipher all together.
 # If you wish to closely examine each function, we advise that you comment out the others to focus on one at a time.
+# To write every graph to image files without opening windows, run render.py instead.
+# To time each step, run: python main.py --profile report.json (see instrument.py)
+# Printed tables are cached on disk per dataset in .results_cache (see results_cache.py); --no-cache skips it
 
 
-def main():
-    # Read in dataframe from Excel document
-    df = pd.read_excel('Baby Names Dataset.xlsx')
+# When a Profiler is passed in, every step below is timed and measured by it (see instrument.py)
+def main(profiler=None):
+    if profiler is None:
+        profiler = Profiler(enabled=False)
+    run = profiler.run
 
-    # Rename columns
-    df.columns = ['year', 'name', 'sex', 'count']
+    # Read in dataframe from Excel document (cached as .npy columns after the first run, see loader.py)
+    # Columns: year, name, sex, count
+    df = run(load_names, 'Baby Names Dataset.xlsx', letter_count=False)
 
-    # Add column containing number of letters in name
-    df['letter_count'] = df['name'].apply(lambda x: len(x))
+    # Adds letter_count (number of letters in name), a stage of its own so the profile reports it separately
+    df = run(add_letter_count, df)
 
     # print(df)
 
     # Prints a list of the 50 longest names in descending order -- Alec
-    longest_names(df)
+    run(longest_names, df)
 
     # Generates a graph showing the popularity of our team's names over time -- Alec
-    plot_team_names(df)
+    run(plot_team_names, df)
 
     # Generates a graph showing the most popular names over time -- Alec
-    plot_popular_names(df)
+    run(plot_popular_names, df)
 
     # Generates a graph showing how average name length has fluctuated over time -- Alec
-    plot_letter_count(df)
+    run(plot_letter_count, df)
 
     # Prints the 50 most popular male and female names since 1880 and a list of names that appear in the data every year
     # -- Alec
-    most_popular_name(df)
+    run(most_popular_name, df)
 
     # Method to show the count of the top 5 names across different centuries -- Colby
-    aggregate_names_by_cent(df)
+    run(aggregate_names_by_cent, df)
 
     # Method to show number of male and female records across centuries -- Colby
-    records_by_century(df)
+    run(records_by_century, df)
 
     # Method to plot sustained popularity of names over different centuries --  Colby
-    names_by_cent(df)
+    run(names_by_cent, df)
 
     # Gets the count of the most popular name in the year 1985 -- Ben
-    most_popular_year_1985_names(df)
+    run(most_popular_year_1985_names, df)
 
     # Gets the count of the most popular name in the year 2000 -- Ben
-    most_popular_year_2000_names(df)
+    run(most_popular_year_2000_names, df)
 
     # Graphs popular names from 1985 to 2000
-    popular_names_1985_2000(df)
+    run(popular_names_1985_2000, df)
 
     # Graphs popular names from 2000 to 2015 -- Ben
-    popular_names_2000_2015(df)
+    run(popular_names_2000_2015, df)
 
     # Graphs popularity of names from pop culture with relation to major pop culture events -- Maddie
-    pop_culture_name(df, "Maverick", 1986, "black")
-    pop_culture_name(df, "Khaleesi", 2011, "black")
-    pop_culture_name(df, "Lucy", 1952, "black")
+    # (events.py measures the rise after any number of name/event pairs at once, or scans every name for one)
+    run(pop_culture_name, df, "Maverick", 1986, "black")
+    run(pop_culture_name, df, "Khaleesi", 2011, "black")
+    run(pop_culture_name, df, "Lucy", 1952, "black")
 
     # methods for "Giselle" and "Daphne" since they need markers on x-axis -- Maddie
-    g_name(df)
-    d_name(df)
+    run(g_name, df)
+    run(d_name, df)
 
 
 # Prints a list of the 50 longest names in descending order -- Alec
 def longest_names(df):
-    df = df.groupby(['name'])['letter_count'].mean().to_frame()
-    df = df.sort_values(['letter_count'], ascending=False)
-    df = df.reset_index()
+    df = length_ranking(df)
     # print(df[:50])
     print(df)
 
+    return df
+
 
 # Generates a graph showing the popularity of our team's names over time -- Alec
 def plot_team_names(df):
-    name_df = pd.pivot_table(df, index='year', columns='name', values='count', fill_value=0)
+    our_names_df = name_matrix(df).frame(['Alec', 'Benjamin', 'Colby', 'Madelyn', 'Ryland'])
 
-    our_names_df = name_df[['Alec', 'Benjamin', 'Colby', 'Madelyn', 'Ryland']]
-
-    plt.figure()
-    our_names_df.plot()
-    plt.title('Popularity of Our Names')
-    plt.xlabel('Year')
-    plt.ylabel('Count')
+    plot_lines(our_names_df, 'Popularity of Our Names')
     plt.show()
 
+    return our_names_df
+
 
 # Generates a graph showing the most popular names over time -- Alec
 def plot_popular_names(df):
     # Top male names: James, John, Robert, Michael, William
     # Top female names: Mary, Elizabeth, Patricia, Jennifer, Linda
 
-    name_df = pd.pivot_table(df, index='year', columns='name', values='count', fill_value=0)
-    top_names_df = name_df[['James', 'John', 'Robert', 'Michael', 'Mary', 'Elizabeth', 'Patricia',
-                            'Jennifer']]
+    top_names_df = name_matrix(df).frame(['James', 'John', 'Robert', 'Michael', 'Mary', 'Elizabeth', 'Patricia',
+                                          'Jennifer'])
 
-    plt.figure()
-    top_names_df.plot()
-    plt.title('Popularity of Top 4 Male and Female Names')
-    plt.xlabel('Year')
-    plt.ylabel('Count')
+    plot_lines(top_names_df, 'Popularity of Top 4 Male and Female Names')
     plt.show()
 
+    return top_names_df
+
 
 # Generates a graph showing how average name length has fluctuated over time -- Alec
+# The average is over babies, not names, read from the year x length histogram
 def plot_letter_count(df):
-    word_count_df = df.groupby('year')['letter_count'].mean().to_frame(name='avg_letter_count')
+    word_count_df = length_histogram(df).mean().to_frame()
 
     plt.figure()
     word_count_df.plot()
@@ -117,61 +130,49 @@ def plot_letter_count(df):
     plt.ylabel('Letters')
     plt.show()
 
+    return word_count_df
+
 
 # Prints the 50 most popular male and female names since 1880 and a list of names that appear in the data every year
 # -- Alec
 def most_popular_name(df):
-    # Dataframe showing which names have appeared on the list the most times
-    name_appearances_df = df.groupby(['name', 'sex'])['count'].count().to_frame()
-    name_appearances_df = name_appearances_df.reset_index()
-    name_appearances_df = name_appearances_df.sort_values(by=['count', 'name'], ascending=True)
-
-    # Male name listed the most times
-    male_apps_df = name_appearances_df[name_appearances_df['sex'] == 'M']
-
-    male_136_df = male_apps_df[male_apps_df['count'] == 136]    # 136 is the total number of years recorded
-    print('\nMale names appearing every year (total: {}):'.format(male_136_df['name'].count()))
-    print(male_136_df['name'].tolist())
+    male_every_year, female_every_year, male_totals_df, female_totals_df = cached_call(popular_name_tables, df)
 
-    # Female name listed the most times
-    female_apps_df = name_appearances_df[name_appearances_df['sex'] == 'F']
+    # Male names listed in every year from the first to the last year recorded
+    print('\nMale names appearing every year (total: {}):'.format(len(male_every_year)))
+    print(male_every_year)
 
-    female_136_df = female_apps_df[female_apps_df['count'] == 136]  # 136 is the total number of years recorded
-    print('\nFemale names appearing every year (total: {}):'.format(female_136_df['name'].count()))
-    print(female_136_df['name'].tolist())
-
-    # Dataframe showing the total number of people given each name
-    name_count_df = df.groupby(['name', 'sex'])['count'].sum().to_frame()
-    name_count_df = name_count_df.reset_index()
+    # Female names listed in every year from the first to the last year recorded
+    print('\nFemale names appearing every year (total: {}):'.format(len(female_every_year)))
+    print(female_every_year)
 
     print('\n')
 
     # Male name with highest count
-    male_totals_df = name_count_df[name_count_df['sex'] == 'M']
-    male_totals_df = male_totals_df.sort_values(['count'], ascending=False)
-    male_totals_df = male_totals_df.reset_index()
-    male_totals_df.index = male_totals_df.index + 1
-    male_totals_df = male_totals_df.drop(columns=['index', 'sex'])
     print('Top 50 male names:')
-    print(male_totals_df[:50])
+    print(male_totals_df)
 
     print()
 
     # Female name with highest count
-    female_totals_df = name_count_df[name_count_df['sex'] == 'F']
-    female_totals_df = female_totals_df.sort_values(['count'], ascending=False)
-    female_totals_df = female_totals_df.reset_index()
-    female_totals_df.index = female_totals_df.index + 1
-    female_totals_df = female_totals_df.drop(columns=['index', 'sex'])
     print('Top 50 female names:')
-    print(female_totals_df[:50])
+    print(female_totals_df)
+
+    return male_totals_df, female_totals_df
+
+
+# Male and female names listed in every year, and the 50 male and female names with the highest totals
+def popular_name_tables(df):
+    # Totals, appearance counts and first/last years per name, kept up to date as new years are added
+    store = name_aggregates(df)
+
+    return store.every_year_names('M'), store.every_year_names('F'), store.top_names('M', 50), \
+        store.top_names('F', 50)
 
 
 # Method to show the count of the top 5 names across different centuries -- Colby
 def aggregate_names_by_cent(df):
-    df["century"] = df["year"].apply(get_century)
-    cent_df = df.groupby(["century", "name"])["count"].sum().to_frame(name="count")
-    cent_df = cent_df.reset_index()
+    cent_df = cached_call(totals_by_period, df, ["name"], "century")
 
     print("Distribution of the Top 5 most popular names across centuries\n\n")
 
@@ -189,325 +190,105 @@ def aggregate_names_by_cent(df):
 
     #  print(cent_df)
 
-    return
+    return cent_df
 
 
 # Method to show number of male and female records across centuries -- Colby
 def records_by_century(df):
-    df["century"] = df["year"].apply(get_century)
-    cent_df = df.groupby(["century", "sex"])["count"].sum().to_frame(name="count")
-    cent_df = cent_df.reset_index()
+    cent_df = cached_call(totals_by_period, df, ["sex"], "century")
 
     print("Number of male and female records across each century/n/n")
 
     print(cent_df)
 
-    return
-
-
-# Method to get century column -- Colby
-def get_century(year):
-    if year < 1900:
-        return "19th"
-    elif year < 2000:
-        return "20th"
-    else:
-        return "21st"
+    return cent_df
 
 
 # Method to plot sustained popularity of names over different centuries --  Colby
+# A name's score is the number of years of the century it appears in (for either sex), from the presence index
 def names_by_cent(df):
-    df["century"] = df["year"].apply(get_century)
-    cent_df = df.groupby("century")["name"].value_counts().to_frame(name="count")
-    cent_df["count"] = cent_df["count"].apply(division)
-    cent_df = cent_df.reset_index()
-
-    top10_19th_df = cent_df[:10]
-    x = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
-    labels = top10_19th_df["name"]
-    plt.figure()
-    top10_19th_df.plot(kind="bar")
-    plt.title("Top 10 Names That Sustained Popularity in the 19th Century")
-    plt.xticks(x, labels, rotation=90)
-    plt.xlabel("Name")
-    plt.ylabel("Count of years over 100")
-    plt.show()
+    top10_dfs = []
 
-    top10_20th_df = cent_df[527:537]
-    x = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
-    labels = top10_20th_df["name"]
-    plt.figure()
-    top10_20th_df.plot(kind="bar")
-    plt.title("Top 10 Names That Sustained Popularity in the 20th Century")
-    plt.xticks(x, labels, rotation=90)
-    plt.xlabel("Name")
-    plt.ylabel("Count of years over 100")
-    plt.show()
-
-    top10_21st_df = cent_df[5633:5643]
-    x = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
-    labels = top10_21st_df["name"]
-    plt.figure()
-    top10_21st_df.plot(kind="bar")
-    plt.title("Top 10 Names That Sustained Popularity in the 21st Century")
-    plt.xticks(x, labels, rotation=90)
-    plt.xlabel("name")
-    plt.ylabel("Count of years over 100")
-    plt.show()
+    for century, first, last in CENTURIES:
+        top10_df = cached_call(sustained_names, df, (first, last), 10)
+        top10_df.insert(0, "century", century)
+        top10_dfs.append(top10_df)
 
-    print(top10_19th_df)
-    print(top10_20th_df)
-    print(top10_21st_df)
+        plt.figure()
+        plt.bar(top10_df["name"], top10_df["years"])
+        plt.title("Top 10 Names That Sustained Popularity in the {} Century".format(century))
+        plt.xticks(rotation=90)
+        plt.xlabel("Name")
+        plt.ylabel("Years appearing in the data")
+        plt.show()
 
+    for top10_df in top10_dfs:
+        print(top10_df)
 
-# Method to divide value counts to avoid double counts -- Colby
-def division(score):
-    return score / 2
+    return top10_dfs
 
 
 # Graphs popular names from 1985 to 2000 -- Ben
 def popular_names_1985_2000(df):
-    # Getting yearly name counts for name Michael
-    mike_df = df[df['name'] == "Michael"]
-    mike_count_df = mike_df.groupby('year')['count'].sum()
-    mike_count_df = mike_count_df.reset_index()
-    mike_year_df = mike_count_df[(mike_count_df['year'] >= 1985) & (mike_count_df['year'] <= 2000)]
-    mike_year_df = mike_year_df.set_index("year")
-
-    # Getting yearly name counts for name Christopher
-    chris_df = df[df['name'] == "Christopher"]
-    chris_count_df = chris_df.groupby('year')['count'].sum()
-    chris_count_df = chris_count_df.reset_index()
-    chris_year_df = chris_count_df[(chris_count_df['year'] >= 1985) & (chris_count_df['year'] <= 2000)]
-    chris_year_df = chris_year_df.set_index("year")
-
-    # Getting yearly name counts for name Jessica
-    jess_df = df[df['name'] == "Jessica"]
-    jess_count_df = jess_df.groupby('year')['count'].sum()
-    jess_count_df = jess_count_df.reset_index()
-    jess_year_df = jess_count_df[(jess_count_df['year'] >= 1985) & (jess_count_df['year'] <= 2000)]
-    jess_year_df = jess_year_df.set_index("year")
-
-    # Getting yearly name counts for name Ashley
-    ashley_df = df[df['name'] == "Ashley"]
-    ashley_count_df = ashley_df.groupby('year')['count'].sum()
-    ashley_count_df = ashley_count_df.reset_index()
-    ashley_year_df = ashley_count_df[
-        (ashley_count_df['year'] >= 1985) & (ashley_count_df['year'] <= 2000)]
-    ashley_year_df = ashley_year_df.set_index("year")
-
-    # Getting yearly name counts for name Matthew
-    matthew_df = df[df['name'] == "Matthew"]
-    matthew_count_df = matthew_df.groupby('year')['count'].sum()
-    matthew_count_df = matthew_count_df.reset_index()
-    matthew_year_df = matthew_count_df[
-        (matthew_count_df['year'] >= 1985) & (matthew_count_df['year'] <= 2000)]
-    matthew_year_df = matthew_year_df.set_index("year")
-
-    # Getting yearly name counts for name Jennifer
-    jen_df = df[df['name'] == "Jennifer"]
-    jen_count_df = jen_df.groupby('year')['count'].sum()
-    jen_count_df = jen_count_df.reset_index()
-    jen_year_df = jen_count_df[(jen_count_df['year'] >= 1985) & (jen_count_df['year'] <= 2000)]
-    jen_year_df = jen_year_df.set_index("year")
-
-    # Getting yearly name counts for name Joshua
-    josh_df = df[df['name'] == "Joshua"]
-    josh_count_df = josh_df.groupby('year')['count'].sum()
-    josh_count_df = josh_count_df.reset_index()
-    josh_year_df = josh_count_df[(josh_count_df['year'] >= 1985) & (josh_count_df['year'] <= 2000)]
-    josh_year_df = josh_year_df.set_index("year")
-
-    # Getting yearly name counts for name Amanda
-    amanda_df = df[df['name'] == "Amanda"]
-    amanda_count_df = amanda_df.groupby('year')['count'].sum()
-    amanda_count_df = amanda_count_df.reset_index()
-    amanda_year_df = amanda_count_df[
-        (amanda_count_df['year'] >= 1985) & (amanda_count_df['year'] <= 2000)]
-    amanda_year_df = amanda_year_df.set_index("year")
-
-    # Getting yearly name counts for name Daniel
-    dan_df = df[df['name'] == "Daniel"]
-    dan_count_df = dan_df.groupby('year')['count'].sum()
-    dan_count_df = dan_count_df.reset_index()
-    dan_year_df = dan_count_df[(dan_count_df['year'] >= 1985) & (dan_count_df['year'] <= 2000)]
-    dan_year_df = dan_year_df.set_index("year")
-
-    # Getting yearly name counts for name David
-    david_df = df[df['name'] == "David"]
-    david_count_df = david_df.groupby('year')['count'].sum()
-    david_count_df = david_count_df.reset_index()
-    david_year_df = david_count_df[(david_count_df['year'] >= 1985) & (david_count_df['year'] <= 2000)]
-    david_year_df = david_year_df.set_index("year")
-
-    # Plotting all yearly counts with labels for each name
-    plt.figure()
-    plt.title("Most Popular Year 1985 Names over 15 Years")
-    plt.xlabel("Year")
-    plt.ylabel("Number of Names")
-    plt.plot(mike_year_df, label='Michael')
-    plt.plot(chris_year_df, label="Christopher")
-    plt.plot(jess_year_df, label="Jessica")
-    plt.plot(ashley_year_df, label="Ashley")
-    plt.plot(matthew_year_df, label="Matthew")
-    plt.plot(jen_year_df, label="Jennifer")
-    plt.plot(josh_year_df, label='Joshua')
-    plt.plot(amanda_year_df, label='Andrew')
-    plt.plot(dan_year_df, label='Hannah')
-    plt.plot(david_year_df, label='Joseph')
-    plt.legend(fontsize=7.5)
-    plt.show()
+    # Getting yearly name counts for each name
+    year_df = yearly_counts(df, ['Michael', 'Christopher', 'Jessica', 'Ashley', 'Matthew', 'Jennifer', 'Joshua',
+                                 'Amanda', 'Daniel', 'David'], years=(1985, 2000))
 
-    return
+    plot_yearly_counts(year_df, "Most Popular Year 1985 Names over 15 Years")
+
+    return year_df
 
 
 # Graphs popular names from 2000 to 2015 -- Ben
 def popular_names_2000_2015(df):
-    # Getting yearly name counts for name Jacob
-    jacob_df = df[df['name'] == "Jacob"]
-    jacob_count_df = jacob_df.groupby('year')['count'].sum()
-    jacob_count_df = jacob_count_df.reset_index()
-    jacob_year_df = jacob_count_df[jacob_count_df['year'] >= 2001]
-    jacob_year_df = jacob_year_df.set_index("year")
-    jacob_year_df.columns = ["Yearly_Count"]
-
-    # Getting yearly name counts for name Michael
-    mike_df = df[df['name'] == "Michael"]
-    mike_count_df = mike_df.groupby('year')['count'].sum()
-    mike_count_df = mike_count_df.reset_index()
-    mike_year_df = mike_count_df[mike_count_df['year'] >= 2001]
-    mike_year_df = mike_year_df.set_index("year")
-
-    # Getting yearly name counts for name Matthew
-    matthew_df = df[df['name'] == "Matthew"]
-    matthew_count_df = matthew_df.groupby('year')['count'].sum()
-    matthew_count_df = matthew_count_df.reset_index()
-    matthew_year_df = matthew_count_df[matthew_count_df['year'] >= 2001]
-    matthew_year_df = matthew_year_df.set_index("year")
-
-    # Getting yearly name counts for name Joshua
-    josh_df = df[df['name'] == "Joshua"]
-    josh_count_df = josh_df.groupby('year')['count'].sum()
-    josh_count_df = josh_count_df.reset_index()
-    josh_year_df = josh_count_df[josh_count_df['year'] >= 2001]
-    josh_year_df = josh_year_df.set_index("year")
-
-    # Getting yearly name counts for name Emily
-    emily_df = df[df['name'] == "Emily"]
-    emily_count_df = emily_df.groupby('year')['count'].sum()
-    emily_count_df = emily_count_df.reset_index()
-    emily_year_df = emily_count_df[emily_count_df['year'] >= 2001]
-    emily_year_df = emily_year_df.set_index("year")
-
-    # Getting yearly name counts for name Christopher
-    chris_df = df[df['name'] == "Christopher"]
-    chris_count_df = chris_df.groupby('year')['count'].sum()
-    chris_count_df = chris_count_df.reset_index()
-    chris_year_df = chris_count_df[chris_count_df['year'] >= 2001]
-    chris_year_df = chris_year_df.set_index("year")
-
-    # Getting yearly name counts for name Nicholas
-    nick_df = df[df['name'] == "Nicholas"]
-    nick_count_df = nick_df.groupby('year')['count'].sum()
-    nick_count_df = nick_count_df.reset_index()
-    nick_year_df = nick_count_df[nick_count_df['year'] >= 2001]
-    nick_year_df = nick_year_df.set_index("year")
-
-    # Getting yearly name counts for name Andrew
-    andrew_df = df[df['name'] == "Andrew"]
-    andrew_count_df = andrew_df.groupby('year')['count'].sum()
-    andrew_count_df = andrew_count_df.reset_index()
-    andrew_year_df = andrew_count_df[andrew_count_df['year'] >= 2001]
-    andrew_year_df = andrew_year_df.set_index("year")
-
-    hannah_df = df[df['name'] == "Hannah"]
-    hannah_count_df = hannah_df.groupby('year')['count'].sum()
-    hannah_count_df = hannah_count_df.reset_index()
-    hannah_year_df = hannah_count_df[hannah_count_df['year'] >= 2001]
-    hannah_year_df = hannah_year_df.set_index("year")
-
-    # Getting yearly name counts for name Joseph
-    joe_df = df[df['name'] == "Joseph"]
-    joe_count_df = joe_df.groupby('year')['count'].sum()
-    joe_count_df = joe_count_df.reset_index()
-    joe_year_df = joe_count_df[joe_count_df['year'] >= 2001]
-    joe_year_df = joe_year_df.set_index("year")
-
-    # Plotting all yearly counts with labels for each name
-    plt.figure()
-    plt.plot(jacob_year_df, label='Jacob')  # Plots Jacobs change using a line
-    plt.plot(mike_year_df, label='Michael')  # Plots Mikes
-    plt.plot(matthew_year_df, label="Matthew")  # Plots Matthew
-    plt.plot(josh_year_df, label="Joshua")  # Plots Josh
-    plt.plot(emily_year_df, label="Emily")  # Plots Emily
-    plt.plot(chris_year_df, label="Christopher")  # plots chris
-    plt.plot(nick_year_df, label='Nicholas')  # plots nick
-    plt.plot(andrew_year_df, label='Andrew')  # plots andrew
-    plt.plot(hannah_year_df, label='Hannah')  # plots hannah
-    plt.plot(joe_year_df, label='Joseph')  # plots joe
-    plt.title("Most Popular Year 2000 Names over 15 Years")
-    plt.xlabel("Year")
-    plt.ylabel("Number of Names")
-    plt.legend(fontsize=7.5)
-    plt.show()
+    # Getting yearly name counts for each name
+    year_df = yearly_counts(df, ['Jacob', 'Michael', 'Matthew', 'Joshua', 'Emily', 'Christopher', 'Nicholas',
+                                 'Andrew', 'Hannah', 'Joseph'], years=(2001, None))
 
-    return
+    plot_yearly_counts(year_df, "Most Popular Year 2000 Names over 15 Years")
 
+    return year_df
 
-# Gets the count of the most popular name in the year 1985 -- Ben
-def most_popular_year_1985_names(df):
-    df_1985 = df[df['year'] == 1985]
-    top10_name_df = df_1985.groupby('name')['count'].sum()
-    top10_name_df = top10_name_df.reset_index()
-    top10_name_df.sort_values(by=["count"], inplace=True, ascending=False)
-    top10_name_df = top10_name_df[:10]
 
-    # Plots each one of the names on basis of their count with color determinants for gender
-    plt.figure()
-    plt.bar(top10_name_df['name'], top10_name_df['count'],
-            color=['blue', 'blue', 'pink', 'pink', 'blue', 'pink', 'blue', 'pink', 'blue', 'blue'])
-    plt.title("Most Popular Names in the Year 1985")
-    plt.xlabel("Name")
-    plt.ylabel("Number of Names")
-    plt.xticks(rotation=90)
+# Plotting all yearly counts in a year x name dataframe with labels for each name (see plotting.py)
+def plot_yearly_counts(year_df, title):
+    plot_lines(year_df, title, ylabel="Number of Names")
     plt.show()
 
-    return
+
+# Gets the count of the most popular name in the year 1985 -- Ben
+def most_popular_year_1985_names(df):
+    return most_popular_year_names(df, 1985)
 
 
 # Gets the count of the most popular name in the year 2000 -- Ben
 def most_popular_year_2000_names(df):
-    df_2000 = df[df['year'] == 2000]
-    top10_name_df = df_2000.groupby('name')['count'].sum()
-    top10_name_df = top10_name_df.reset_index()
-    top10_name_df.sort_values(by=["count"], inplace=True, ascending=False)
-    top10_name_df = top10_name_df[:10]
+    return most_popular_year_names(df, 2000)
+
+
+# Graphs the count of the 10 most popular names in any year, read from the precomputed rank table
+def most_popular_year_names(df, year, k=10):
+    top10_name_df = rank_table(df).top(year, k)
 
-    # Plots each one of the names on basis of their count with color determinants for gender
+    # Plots each one of the names on basis of their count, coloured by the sex most babies with the name had
     plt.figure()
     plt.bar(top10_name_df['name'], top10_name_df['count'],
-            color=['blue', 'blue', 'blue', 'blue', 'pink', 'blue', 'blue', 'blue', 'pink', 'blue'])
-    plt.title("Most Popular Names in the Year 2000")
+            color=[SEX_COLORS[sex] for sex in top10_name_df['sex']])
+    plt.title("Most Popular Names in the Year {}".format(year))
     plt.xlabel("Name")
     plt.ylabel("Number of Names")
     plt.xticks(rotation=90)
     plt.show()
 
-    return
+    return top10_name_df
 
 
 # -- Maddie
 # Takes in the dataframe, desired name, and desired line color
-# Finds index of name, puts all indexes into a list
-# Loops through list, adds birth year and number of names for that year
+# Looks up the rows for the name in the name index and adds them up by year (both sexes, and every state)
 # Plots all names in a pivot table
 def name_over_years(df, name, c):
-    index_list = np.where(df["name"] == name)
-
-    name_df = pd.DataFrame()
-
-    for index in index_list:
-        name_df = df[["year", "count"]].iloc[index].reset_index()
+    name_df = name_index(df).series(df, name).rename("count").reset_index()
 
     plt.figure()
     plt.plot(name_df["year"], name_df["count"], color=c)
@@ -518,20 +299,16 @@ def name_over_years(df, name, c):
 
     # print(name_df.to_string())
 
+    return name_df
+
 
 # -- Maddie
 # Takes in the dataframe, desired name, desired year and desired line color
 # Desired year is the release year of whatever movie or tv show corresponds to the name
-# Finds index of name, puts all indexes into a list
-# Loops through list, adds birth year and number of names for that year
+# Looks up the rows for the name in the name index and adds them up by year (both sexes, and every state)
 # Plots all names in a pivot table
 def pop_culture_name(df, name, year, c):
-    index_list = np.where(df["name"] == name)
-
-    name_df = pd.DataFrame()
-
-    for index in index_list:
-        name_df = df[["year", "count"]].iloc[index].reset_index()
+    name_df = name_index(df).series(df, name).rename("count").reset_index()
 
     plt.figure()
     plt.plot(name_df["year"], name_df["count"], color=c)
@@ -541,17 +318,14 @@ def pop_culture_name(df, name, year, c):
     plt.ylabel("Number of Babies")
     plt.show()
 
+    return name_df
+
 
 # -- Maddie
 # Plots popularity of "Giselle" from 1880-2015
 # Marks x axis at 1996, 2007, and 2009 to signify special events
 def g_name(df):
-    index_list = np.where(df["name"] == "Giselle")
-
-    name_df = pd.DataFrame()
-
-    for index in index_list:
-        name_df = df[["year", "count"]].iloc[index].reset_index()
+    name_df = name_index(df).series(df, "Giselle").rename("count").reset_index()
 
     plt.figure()
     plt.plot(name_df["year"], name_df["count"], color="black")
@@ -563,16 +337,13 @@ def g_name(df):
     plt.ylabel("Number of Babies")
     plt.show()
 
+    return name_df
+
 
 # plots popularity of "Daphne" from 1880-2015
 # marks x axis at 1969 and 2002 to signify special events
 def d_name(df):
-    index_list = np.where(df["name"] == "Daphne")
-
-    name_df = pd.DataFrame()
-
-    for index in index_list:
-        name_df = df[["year", "count"]].iloc[index].reset_index()
+    name_df = name_index(df).series(df, "Daphne").rename("count").reset_index()
 
     plt.figure()
     plt.plot(name_df["year"], name_df["count"], color="black")
@@ -582,5 +353,26 @@ def d_name(df):
     plt.xlabel("Year")
     plt.ylabel("Number of Babies")
 
+    return name_df
+
 
-main()
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run every baby names analysis.')
+    parser.add_argument('--profile', metavar='REPORT',
+                        help='record time, memory and rows for every step and write them to REPORT (.json or .csv)')
+    parser.add_argument('--cprofile', metavar='DIR', help='with --profile, also dump cProfile stats per step to DIR')
+    parser.add_argument('--no-cache', action='store_true', help='recompute every table instead of using .results_cache')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    RESULTS_CACHE.enabled = not args.no_cache
+
+    if args.profile:
+        profiler = Profiler(cprofile_dir=args.cprofile)
+        main(profiler)
+        profiler.write_report(args.profile)
+        profiler.summary()
+    else:
+        main()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+from name_matrix import encode
+
+
+# Row index of a names dataframe grouped by name
+# order lists the row positions sorted by name (stable, so each name keeps its rows in table order)
+# and the rows for name code i are order[offsets[i]:offsets[i + 1]]
+# years runs from the first to the last year in the dataframe
+class NameIndex:
+    def __init__(self, names, order, offsets, years):
+        self.names = names
+        self.order = order
+        self.offsets = offsets
+        self.years = years
+
+        # name -> code
+        self.codes = {name: i for i, name in enumerate(names)}
+
+    # Positions (for iloc) of every row with this name, empty if the name is not in the data
+    def rows(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            return self.order[:0]
+
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    # Number of rows with this name
+    def row_count(self, name):
+        code = self.codes.get(name)
+        if code is None:
+            return 0
+
+        return int(self.offsets[code + 1] - self.offsets[code])
+
+    # Yearly counts for one name in df (the dataframe the index was built from) as a Series over every year
+    # Only the name's rows are read; they are added up by year, so both sexes and, in the state-level data,
+    # every state give one value per year
+    def series(self, df, name):
+        if name not in self.codes:
+            raise KeyError('Name not in dataset: {}'.format(name))
+
+        rows = self.rows(name)
+        years = df['year'].to_numpy()[rows].astype(np.int64) - self.years[0]
+        values = np.bincount(years, weights=df['count'].to_numpy()[rows], minlength=len(self.years))
+
+        return pd.Series(values.astype(np.int64), index=pd.Index(self.years, name='year'), name=name)
+
+
+def build_name_index(df):
+    name_codes, names = encode(df['name'])
+
+    order = np.argsort(name_codes, kind='stable')
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(name_codes, minlength=len(names)), out=offsets[1:])
+
+    year = df['year'].to_numpy()
+    years = np.arange(int(year.min()), int(year.max()) + 1)
+
+    return NameIndex(names, order, offsets, years)
+
+
+# Returns the name row index for this dataframe, building it on first use
+def name_index(df):
+    return cached_for_frame(df, 'name_index', build_name_index)
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+
+
+# Dense year x name matrix of counts, split by sex
+# counts[s, y, n] is the number of babies of sex sexes[s] given names[n] in year years[y]
+# Rows cover every year from the first to the last year in the data, missing combinations are 0
+class NameMatrix:
+    def __init__(self, years, names, sexes, counts):
+        self.years = years
+        self.names = names
+        self.sexes = sexes
+        self.counts = counts
+
+        # name -> column of counts
+        self.columns = {name: i for i, name in enumerate(names)}
+
+    def column(self, name):
+        if name not in self.columns:
+            raise KeyError('Name not in dataset: {}'.format(name))
+
+        return self.columns[name]
+
+    # Yearly counts for one name as a Series indexed by year
+    # sex=None adds up both sexes, years is an inclusive (first, last) range where either end may be None
+    def series(self, name, sex=None, years=None):
+        rows = self.year_rows(years)
+        values = self.sex_counts(sex)[..., rows, self.column(name)]
+        if sex is None:
+            values = values.sum(axis=0)
+
+        return pd.Series(values, index=pd.Index(self.years[rows], name='year'), name=name)
+
+    # Yearly counts for several names as a year x name dataframe, columns in the order given
+    def frame(self, names, sex=None, years=None):
+        rows = self.year_rows(years)
+        cols = [self.column(name) for name in names]
+        values = self.sex_counts(sex)[..., rows, :][..., cols]
+        if sex is None:
+            values = values.sum(axis=0)
+
+        return pd.DataFrame(values, index=pd.Index(self.years[rows], name='year'),
+                            columns=pd.Index(list(names), name='name'))
+
+    # Counts for every name in one year as a Series indexed by name
+    def year_counts(self, year, sex=None):
+        values = self.sex_counts(sex)[..., self.year_row(year), :]
+        if sex is None:
+            values = values.sum(axis=0)
+
+        return pd.Series(values, index=pd.Index(self.names, name='name'), name='count')
+
+    def sex_counts(self, sex):
+        if sex is None:
+            return self.counts
+
+        return self.counts[self.sexes.index(sex)]
+
+    def year_row(self, year):
+        if not self.years[0] <= year <= self.years[-1]:
+            raise KeyError('Year not in dataset: {}'.format(year))
+
+        return int(year - self.years[0])
+
+    def year_rows(self, years):
+        if years is None:
+            return slice(None)
+
+        first, last = years
+        start = 0 if first is None else max(first - self.years[0], 0)
+        stop = len(self.years) if last is None else max(last - self.years[0] + 1, 0)
+        return slice(start, stop)
+
+
+# Integer codes and their labels for a name/sex column, categorical or plain
+def encode(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), list(column.cat.categories)
+
+    codes, labels = pd.factorize(column, sort=True)
+    return codes, list(labels)
+
+
+def build_name_matrix(df):
+    name_codes, names = encode(df['name'])
+    sex_codes, sexes = encode(df['sex'])
+
+    year = df['year'].to_numpy()
+    first_year = int(year.min())
+    years = np.arange(first_year, int(year.max()) + 1)
+
+    counts = np.zeros((len(sexes), len(years), len(names)), dtype=np.int32)
+    np.add.at(counts, (sex_codes, year - first_year, name_codes), df['count'].to_numpy())
+
+    return NameMatrix(years, names, sexes, counts)
+
+
+# Returns the count matrix for this dataframe, building it on first use
+def name_matrix(df):
+    return cached_for_frame(df, 'name_matrix', build_name_matrix)
+
+
+# Yearly counts of several names at once as a year x name dataframe
+# Reads the names' columns out of the shared count matrix, so the cost depends on the size of the result
+# rather than on the number of names times the size of the table
+def yearly_counts(df, names, years=None, sex=None):
+    return name_matrix(df).frame(names, sex=sex, years=years)
@@ -0,0 +1,189 @@
+import argparse
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+from loader import DATASET_PATH, load_names
+from name_matrix import encode, name_matrix
+
+
+# Queries shorter than this many letters allow one edit by default, longer ones two; below it two edits would leave
+# the trigram index unable to rule out any name
+SHORT_NAME = 8
+
+
+# Case-insensitive prefix and fuzzy search over the distinct names of a dataset
+# keys holds the lower-cased names in sorted order (keys[i] belongs to names[key_codes[i]]), so a prefix is a
+# bisect range. grams maps every trigram of a padded lower-cased name ('$$maria$') to the codes of the names
+# containing it and bigrams does the same for bigrams ('$maria$'); fuzzy lookups only compare the names sharing
+# enough trigrams and bigrams with the query
+# totals[i] is the number of babies given names[i], used to list popular names first
+class NameSearch:
+    def __init__(self, names, totals):
+        self.names = names
+        self.totals = totals
+
+        # name -> code
+        self.codes = {name: i for i, name in enumerate(names)}
+
+        lowered = [name.lower() for name in names]
+        self.key_codes = np.array(sorted(range(len(names)), key=lowered.__getitem__), dtype=np.int64)
+        self.keys = [lowered[i] for i in self.key_codes]
+        self.lengths = np.array([len(name) for name in lowered])
+
+        # Lower-cased names as rows of code points, for edit_distances
+        width = int(self.lengths.max()) if len(lowered) else 1
+        self.letters = np.array(lowered, dtype='U{}'.format(width)).view(np.uint32).reshape(len(lowered), width)
+
+        self.grams = gram_postings(lowered, 3)
+        self.bigrams = gram_postings(lowered, 2)
+
+    # Names starting with prefix (any case), most babies first
+    def prefix(self, prefix, limit=20):
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.keys, prefix)
+        stop = bisect.bisect_left(self.keys, prefix + '\uffff', start)
+        return self.ranked(self.key_codes[start:stop], limit)
+
+    # Names within max_distance edits (insertions, deletions, substitutions and swaps of neighbouring letters)
+    # of name, closest first and then most babies first; an exact match comes first
+    # max_distance defaults to 1 for names shorter than SHORT_NAME letters and 2 for longer ones, which keeps every
+    # lookup on the gram indexes; larger distances on short names compare every name of a similar length
+    def fuzzy(self, name, max_distance=None, limit=20):
+        query = name.lower()
+        if max_distance is None:
+            max_distance = 1 if len(query) < SHORT_NAME else 2
+
+        keep = np.abs(self.lengths - len(query)) <= max_distance
+        for q, postings in [(3, self.grams), (2, self.bigrams)]:
+            # An edit removes at most q + 1 of the query's distinct q-grams (a swap of neighbouring letters can),
+            # so a match shares at least this many of them; a bound of 0 or less rules nothing out
+            grams = set(qgrams(query, q))
+            needed = len(grams) - (q + 1) * max_distance
+            if needed > 0:
+                lists = [postings[gram] for gram in grams if gram in postings]
+                if not lists:
+                    return []
+                keep &= np.bincount(np.concatenate(lists), minlength=len(self.names)) >= needed
+
+        candidates = np.flatnonzero(keep)
+
+        width = min(len(query) + max_distance, self.letters.shape[1])
+        distances = edit_distances(query, self.letters[candidates, :width], self.lengths[candidates])
+        close = distances <= max_distance
+        candidates, distances = candidates[close], distances[close]
+
+        order = np.lexsort((candidates, -self.totals[candidates], distances))[:limit]
+        return [self.names[code] for code in candidates[order]]
+
+    # Spelling variants of name found in the data (name itself first when present)
+    def variants(self, name, max_distance=1):
+        return self.fuzzy(name, max_distance, limit=None)
+
+    # Names for codes, most babies first (ties in name order), at most limit of them
+    def ranked(self, codes, limit):
+        totals = self.totals[codes]
+        if limit is not None and len(codes) > limit:
+            top = np.argpartition(-totals, limit - 1)[:limit]
+            codes, totals = codes[top], totals[top]
+
+        order = np.lexsort((codes, -totals))
+        return [self.names[code] for code in codes[order]]
+
+
+# q-grams of a name padded with '$' so its first and last letters are covered as often as the middle ones
+def qgrams(name, q):
+    padded = '$' * (q - 1) + name + '$'
+    return [padded[i:i + q] for i in range(len(padded) - q + 1)]
+
+
+# q-gram -> codes of the names containing it
+def gram_postings(names, q):
+    postings = {}
+    for code, name in enumerate(names):
+        for gram in set(qgrams(name, q)):
+            postings.setdefault(gram, []).append(code)
+
+    return {gram: np.array(codes, dtype=np.int32) for gram, codes in postings.items()}
+
+
+# Edit distances from query to many names at once, counting swaps of neighbouring letters as one edit (optimal
+# string alignment). letters holds one name per row as code points padded with zeros, lengths their lengths
+# The dynamic programme runs over the query's letters; each row of it is computed for every name and position with
+# array operations, the insertions along the row through a running minimum
+def edit_distances(query, letters, lengths):
+    query = np.array([ord(letter) for letter in query], dtype=np.uint32)
+    width = letters.shape[1]
+    steps = np.arange(width + 1)
+
+    before = None
+    previous = np.broadcast_to(steps, (len(letters), width + 1))
+    for i in range(1, len(query) + 1):
+        current = np.empty_like(previous)
+        current[:, 0] = i
+        current[:, 1:] = np.minimum(previous[:, 1:] + 1, previous[:, :-1] + (letters != query[i - 1]))
+        if i > 1:
+            swapped = (letters[:, 1:] == query[i - 2]) & (letters[:, :-1] == query[i - 1])
+            current[:, 2:] = np.where(swapped, np.minimum(current[:, 2:], before[:, :-2] + 1), current[:, 2:])
+        current = np.minimum.accumulate(current - steps, axis=1) + steps
+        before, previous = previous, current
+
+    return previous[np.arange(len(letters)), lengths]
+
+
+def build_name_search(df):
+    name_codes, names = encode(df['name'])
+    totals = np.bincount(name_codes, weights=df['count'].to_numpy(), minlength=len(names)).astype(np.int64)
+
+    return NameSearch(names, totals)
+
+
+# Returns the name search index for this dataframe, building it on first use
+def name_search(df):
+    return cached_for_frame(df, 'name_search', build_name_search)
+
+
+# Spelling variants of each name found in the data, as name -> variants (see NameSearch.variants)
+def group_variants(df, names, max_distance=1):
+    search = name_search(df)
+    return {name: search.variants(name, max_distance) for name in names}
+
+
+# Yearly counts with every group of spellings added up, as a year x group dataframe
+# groups maps a label to the names counted under it, e.g. group_variants(df, ['Khaleesi']) or
+# {'Madelyn': ['Madelyn', 'Madeline', 'Madalyn']}; names missing from the data are skipped
+def variant_frame(df, groups, sex=None, years=None):
+    matrix = name_matrix(df)
+    year_df = pd.DataFrame({
+        label: matrix.frame([name for name in names if name in matrix.columns], sex=sex, years=years).sum(axis=1)
+        for label, names in groups.items()
+    })
+    year_df.columns.name = 'name'
+    return year_df
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Look up names by prefix or approximate spelling.')
+    parser.add_argument('query', help='name or prefix to look up')
+    parser.add_argument('--prefix', action='store_true', help='list names starting with the query')
+    parser.add_argument('--distance', type=int, help='most edits allowed in a fuzzy match (default: 1 for names '
+                                                       'shorter than {} letters, 2 otherwise)'.format(SHORT_NAME))
+    parser.add_argument('--limit', type=int, default=20, help='most names to list')
+    parser.add_argument('--data', default=DATASET_PATH, help='path to the Excel dataset')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    df = load_names(args.data)
+    search = name_search(df)
+
+    if args.prefix:
+        matches = search.prefix(args.query, args.limit)
+    else:
+        matches = search.fuzzy(args.query, args.distance, args.limit)
+
+    for name in matches:
+        print('{:<20} {:>12,}'.format(name, search.totals[search.codes[name]]))
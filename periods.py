@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+
+
+# Periods are (label, first year, last year) with inclusive bounds; None leaves that end open
+CENTURIES = [
+    ('19th', None, 1899),
+    ('20th', 1900, 1999),
+    ('21st', 2000, None),
+]
+
+GENERATIONS = [
+    ('Lost Generation', 1883, 1900),
+    ('Greatest Generation', 1901, 1927),
+    ('Silent Generation', 1928, 1945),
+    ('Baby Boomers', 1946, 1964),
+    ('Gen X', 1965, 1980),
+    ('Millennials', 1981, 1996),
+    ('Gen Z', 1997, 2012),
+    ('Gen Alpha', 2013, 2024),
+]
+
+NAMED_PERIODS = {
+    'century': CENTURIES,
+    'generation': GENERATIONS,
+}
+
+
+# Labels every year with the period it falls in, as an ordered categorical
+# Years outside every period get a missing value
+def bucket_years(years, periods):
+    years = np.asarray(years)
+
+    conditions = []
+    for label, first, last in periods:
+        condition = np.ones(len(years), dtype=bool)
+        if first is not None:
+            condition &= years >= first
+        if last is not None:
+            condition &= years <= last
+        conditions.append(condition)
+
+    codes = np.select(conditions, np.arange(len(periods)), default=-1)
+    labels = [label for label, first, last in periods]
+
+    return pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+
+
+# Labels every year with its decade ('1880s', '1890s', ...) using integer division
+def bucket_decades(years):
+    decades = np.asarray(years) // 10
+    first = int(decades.min())
+    labels = ['{}0s'.format(decade) for decade in range(first, int(decades.max()) + 1)]
+
+    return pd.Categorical.from_codes(decades - first, categories=labels, ordered=True)
+
+
+# Returns the period of every row of df as a categorical Series aligned with df, computed once per dataframe
+# periods is 'century', 'decade', 'generation' or a list of (label, first year, last year) periods
+# The column is cached alongside df rather than added to it, so callers' frames are never modified
+def period_column(df, periods='century'):
+    if isinstance(periods, str):
+        key = ('period', periods)
+        name = periods
+    else:
+        periods = [tuple(period) for period in periods]
+        key = ('period', tuple(periods))
+        name = 'period'
+
+    def build(frame):
+        if periods == 'decade':
+            values = bucket_decades(frame['year'])
+        elif isinstance(periods, str):
+            values = bucket_years(frame['year'], NAMED_PERIODS[periods])
+        else:
+            values = bucket_years(frame['year'], periods)
+
+        return pd.Series(values, index=frame.index, name=name)
+
+    return cached_for_frame(df, key, build)
+
+
+# Sums count by period and the given columns, e.g. totals_by_period(df, ['sex']) for births by century and sex
+def totals_by_period(df, by, periods='century'):
+    period = period_column(df, periods)
+    totals = df.groupby([period] + [df[column] for column in by], observed=True)['count'].sum()
+
+    return totals.to_frame(name='count').reset_index()
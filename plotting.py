@@ -0,0 +1,114 @@
+import argparse
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+
+from loader import DATASET_PATH, load_names
+from name_matrix import name_matrix
+
+
+# Most series drawn as lines of their own; the rest are summarised as one band
+MAX_LINES = 40
+
+# Most points per line; longer series keep every k-th point (and the last one)
+MAX_POINTS = 500
+
+# Legend entries per legend column
+LEGEND_ROWS = 20
+
+# Colour map lines are coloured from when there are more lines than colours in the colour cycle
+COLORMAP = 'turbo'
+
+
+# Plots every column of a year x name dataframe as a line, all in one LineCollection, on a new figure
+# Columns keep their order; each line is labelled with its column name in the legend and gets a colour of its own,
+# from the current colour cycle when it has enough colours and evenly spaced along COLORMAP otherwise
+# With more than max_lines columns only the max_lines with the largest totals get lines of their own and the others
+# are drawn as the band between their 10th and 90th percentile per year with their median as a dashed line,
+# so drawing time depends on max_lines rather than the number of columns
+# Returns the axes, ready for plt.show()
+def plot_lines(year_df, title, xlabel='Year', ylabel='Count', max_lines=MAX_LINES, legend_size=7.5):
+    years = year_df.index.to_numpy()
+    values = year_df.to_numpy(dtype=np.float64).T
+    labels = [str(column) for column in year_df.columns]
+
+    if len(years) > MAX_POINTS:
+        keep = np.unique(np.r_[np.arange(0, len(years), -(-len(years) // MAX_POINTS)), len(years) - 1])
+        years, values = years[keep], values[:, keep]
+
+    rest = None
+    if len(labels) > max_lines:
+        top = np.sort(np.argsort(-values.sum(axis=1), kind='stable')[:max_lines])
+        rest = np.delete(values, top, axis=0)
+        values, labels = values[top], [labels[i] for i in top]
+
+    line_colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    if len(labels) > len(line_colors):
+        line_colors = plt.get_cmap(COLORMAP)(np.linspace(0, 1, len(labels)))
+    line_colors = list(line_colors[:len(labels)])
+
+    plt.figure()
+    ax = plt.gca()
+    segments = np.stack([np.broadcast_to(years, values.shape), values], axis=-1)
+    ax.add_collection(LineCollection(segments, colors=line_colors))
+
+    handles = [Line2D([], [], color=color, label=label) for color, label in zip(line_colors, labels)]
+    if rest is not None:
+        low, median, high = np.percentile(rest, [10, 50, 90], axis=0)
+        ax.fill_between(years, low, high, color='lightgrey', alpha=0.6, linewidth=0)
+        ax.plot(years, median, color='grey', linestyle='--')
+        handles.append(Line2D([], [], color='grey', linestyle='--',
+                              label='{} other names (median, 10-90%)'.format(len(rest))))
+
+    ax.autoscale_view()
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.legend(handles=handles, fontsize=legend_size, ncol=-(-len(handles) // LEGEND_ROWS))
+
+    return ax
+
+
+# One plt.plot call per column, as main.py used to draw, for comparison with plot_lines
+def plot_lines_one_by_one(year_df, title):
+    plt.figure()
+    for name in year_df.columns:
+        plt.plot(year_df[name], label=name)
+    plt.title(title)
+    plt.legend(fontsize=7.5)
+    return plt.gca()
+
+
+# Seconds to build and draw a figure of the n most popular names for each n, with both plotting approaches
+def compare_render_times(df, sizes):
+    matrix = name_matrix(df)
+    totals = matrix.counts.sum(axis=(0, 1))
+    results = []
+    for n in sizes:
+        names = [matrix.names[i] for i in np.argsort(-totals, kind='stable')[:n]]
+        year_df = matrix.frame(names)
+
+        timings = {}
+        for label, plot in [('line_collection', plot_lines), ('one_by_one', plot_lines_one_by_one)]:
+            start = time.perf_counter()
+            ax = plot(year_df, 'Top {} names'.format(n))
+            ax.figure.canvas.draw()
+            timings[label] = time.perf_counter() - start
+            plt.close(ax.figure)
+        results.append((n, timings['line_collection'], timings['one_by_one']))
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time drawing the most popular names with and without batching.')
+    parser.add_argument('--names', default='10,100,1000', help='comma-separated numbers of names to plot')
+    parser.add_argument('--data', default=DATASET_PATH, help='path to the Excel dataset')
+    args = parser.parse_args()
+
+    plt.switch_backend('Agg')
+    for n, batched, one_by_one in compare_render_times(load_names(args.data), [int(n) for n in args.names.split(',')]):
+        print('{:>6} names  LineCollection {:>7.3f}s  one plt.plot per name {:>7.3f}s'.format(n, batched, one_by_one))
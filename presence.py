@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+from name_matrix import name_matrix
+
+
+# Number of set bits in each byte, for numpy versions without np.bitwise_count
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+# Number of set bits in every row of a packed uint8 bit array
+def popcount(bits):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits).sum(axis=-1, dtype=np.int64)
+
+    return _BYTE_POPCOUNT[bits].sum(axis=-1, dtype=np.int64)
+
+
+# Shifts every row of a packed bit array one bit towards the first year, filling the last year with 0
+def shift_rows(bits):
+    shifted = bits << 1
+    shifted[..., :-1] |= bits[..., 1:] >> 7
+    return shifted
+
+
+# One bitset per name over all years: bit y is set when the name appears in the data in year years[y]
+# bits[s] holds the bitsets for sexes[s], and the extra last plane bits[-1] those for either sex
+# Bitsets are packed 8 years to a byte with np.packbits, first year in the highest bit of the first byte
+class PresenceIndex:
+    def __init__(self, years, names, sexes, bits):
+        self.years = years
+        self.names = names
+        self.sexes = sexes
+        self.bits = bits
+
+    def sex_bits(self, sex):
+        if sex is None:
+            return self.bits[-1]
+
+        return self.bits[self.sexes.index(sex)]
+
+    # Packed mask with the bits of an inclusive (first, last) year range set; either end may be None
+    def year_mask(self, years):
+        selected = np.ones(len(self.years), dtype=bool)
+        if years is not None:
+            first, last = years
+            if first is not None:
+                selected &= self.years >= first
+            if last is not None:
+                selected &= self.years <= last
+
+        return np.packbits(selected)
+
+    # Number of years each name appears in, optionally within a year range, as a Series indexed by name
+    def years_present(self, sex=None, years=None):
+        bits = self.sex_bits(sex)
+        if years is not None:
+            bits = bits & self.year_mask(years)
+
+        return pd.Series(popcount(bits), index=pd.Index(self.names, name='name'), name='years')
+
+    # Alphabetical list of the names present in every year of the data
+    def every_year(self, sex=None):
+        present = self.years_present(sex)
+        return present.index[present == len(self.years)].tolist()
+
+    # Longest run of consecutive years each name appears in, as a Series indexed by name
+    # Each round of x &= x shifted by one year clears the last year of every run, so a name's longest run is
+    # the number of rounds until its bitset is empty
+    def longest_run(self, sex=None, years=None):
+        bits = self.sex_bits(sex)
+        if years is not None:
+            bits = bits & self.year_mask(years)
+
+        runs = np.zeros(len(self.names), dtype=np.int64)
+        active = np.flatnonzero(bits.any(axis=-1))
+        bits = bits[active]
+        while len(active):
+            runs[active] += 1
+            bits = bits & shift_rows(bits)
+            alive = bits.any(axis=-1)
+            active = active[alive]
+            bits = bits[alive]
+
+        return pd.Series(runs, index=pd.Index(self.names, name='name'), name='longest_run')
+
+
+def build_presence_index(df):
+    matrix = name_matrix(df)
+
+    present = matrix.counts > 0
+    present = np.concatenate([present, present.any(axis=0)[np.newaxis]])
+
+    # (sex, year, name) -> (sex, name, packed years)
+    bits = np.packbits(present.transpose(0, 2, 1), axis=-1)
+
+    return PresenceIndex(matrix.years, matrix.names, matrix.sexes, bits)
+
+
+# Returns the presence index for this dataframe, building it on first use
+def presence_index(df):
+    return cached_for_frame(df, 'presence_index', build_presence_index)
+
+
+# The k names present in the most years of an inclusive (first, last) year range
+# Ties are broken by the number of babies given the name in that range, then alphabetically
+def sustained_names(df, years, k=10, sex=None):
+    present = presence_index(df).years_present(sex, years)
+
+    matrix = name_matrix(df)
+    totals = matrix.sex_counts(sex)[..., matrix.year_rows(years), :].sum(axis=-2)
+    if sex is None:
+        totals = totals.sum(axis=0)
+
+    order = np.lexsort((np.arange(len(totals)), -totals, -present.to_numpy()))[:k]
+
+    return pd.DataFrame({
+        'name': present.index[order],
+        'years': present.to_numpy()[order],
+        'count': totals[order],
+    })
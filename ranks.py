@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+from name_matrix import encode
+
+
+# Bar colour for each sex when plotting top names
+SEX_COLORS = {'M': 'blue', 'F': 'pink'}
+
+
+# Rank of every name in every year, for each sex and for both sexes together (sex=None)
+# Rows are sorted by (sex group, year, rank), so the top K of a year is the first K rows of its block,
+# and rank_order lists the same rows sorted by (sex group, name, year) for rank trajectories
+# The sex of a row in the both-sexes ranking is the sex most of that year's babies with the name had
+# Ties in count are ranked alphabetically
+class RankTable:
+    def __init__(self, names, sexes, year, rank, name_codes, count, sex_codes, year_blocks, rank_order, name_blocks):
+        self.names = names
+        self.sexes = sexes
+        self.year = year
+        self.rank = rank
+        self.name_codes = name_codes
+        self.count = count
+        self.sex_codes = sex_codes
+
+        # (sex or None, year) -> (start, end) of that year's rows
+        self.year_blocks = year_blocks
+        self.rank_order = rank_order
+        # (sex or None, name) -> (start, end) in rank_order
+        self.name_blocks = name_blocks
+
+    # Top k names of one year as a dataframe with columns rank, name, count and sex
+    def top(self, year, k=10, sex=None):
+        start, end = self.year_blocks.get((sex, year), (0, 0))
+        return self.rows(slice(start, min(end, start + k)))
+
+    # Rank of a name in every year it appears in, as a Series indexed by year
+    def trajectory(self, name, sex=None):
+        start, end = self.name_blocks.get((sex, name), (0, 0))
+        rows = self.rank_order[start:end]
+        return pd.Series(self.rank[rows], index=pd.Index(self.year[rows], name='year'), name=name)
+
+    def rows(self, rows):
+        return pd.DataFrame({
+            'rank': self.rank[rows],
+            'name': [self.names[code] for code in self.name_codes[rows]],
+            'count': self.count[rows],
+            'sex': [self.sexes[code] for code in self.sex_codes[rows]],
+        })
+
+
+def build_rank_table(df):
+    name_codes, names = encode(df['name'])
+    sex_codes, sexes = encode(df['sex'])
+    year = df['year'].to_numpy().astype(np.int64)
+    count = df['count'].to_numpy().astype(np.int64)
+
+    n_names = len(names)
+    n_sexes = len(sexes)
+    first_year = year.min()
+
+    # Total per (year, sex, name), in case a name appears in several rows of the same year and sex
+    key = ((year - first_year) * n_sexes + sex_codes) * n_names + name_codes
+    keys, inverse = np.unique(key, return_inverse=True)
+    sex_count = np.bincount(inverse, weights=count).astype(np.int64)
+    sex_name = keys % n_names
+    sex_sex = (keys // n_names) % n_sexes
+    sex_year = keys // (n_names * n_sexes)
+
+    # Total per (year, name) over both sexes, keeping the sex with the larger count
+    year_name = sex_year * n_names + sex_name
+    order = np.lexsort((-sex_count, year_name))
+    starts = np.flatnonzero(np.r_[True, np.diff(year_name[order]) != 0])
+    all_count = np.add.reduceat(sex_count[order], starts)
+    all_sex = sex_sex[order][starts]
+    all_name = sex_name[order][starts]
+    all_year = sex_year[order][starts]
+
+    # Group n_sexes holds the both-sexes ranking
+    group = np.concatenate([sex_sex, np.full(len(all_count), n_sexes)])
+    year = np.concatenate([sex_year, all_year])
+    name = np.concatenate([sex_name, all_name])
+    count = np.concatenate([sex_count, all_count])
+    sex = np.concatenate([sex_sex, all_sex])
+
+    order = np.lexsort((name, -count, year, group))
+    group, year, name, count, sex = group[order], year[order], name[order], count[order], sex[order]
+
+    block_starts = np.flatnonzero(np.r_[True, (np.diff(group) != 0) | (np.diff(year) != 0)])
+    block_ends = np.r_[block_starts[1:], len(group)]
+    block_sizes = block_ends - block_starts
+    rank = np.arange(len(group)) - np.repeat(block_starts, block_sizes) + 1
+
+    labels = sexes + [None]
+    year = year + first_year
+    year_blocks = {(labels[group[start]], int(year[start])): (int(start), int(end))
+                   for start, end in zip(block_starts, block_ends)}
+
+    rank_order = np.lexsort((year, name, group))
+    by_name = np.c_[group[rank_order], name[rank_order]]
+    name_starts = np.flatnonzero(np.r_[True, (np.diff(by_name, axis=0) != 0).any(axis=1)])
+    name_ends = np.r_[name_starts[1:], len(rank_order)]
+    name_blocks = {(labels[by_name[start, 0]], names[by_name[start, 1]]): (int(start), int(end))
+                   for start, end in zip(name_starts, name_ends)}
+
+    return RankTable(names, sexes, year.astype(np.int16), rank.astype(np.int32), name, count, sex,
+                     year_blocks, rank_order, name_blocks)
+
+
+# Returns the rank table for this dataframe, building it on first use
+def rank_table(df):
+    return cached_for_frame(df, 'rank_table', build_rank_table)
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+# Render without a display; must happen before pyplot is imported by main
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+
+import main as analyses
+from loader import DATASET_PATH, load_names
+from shared_frame import SharedFrame, attach_frame
+
+
+# Every figure main() draws, as (function name in main.py, extra arguments after df)
+FIGURES = [
+    ('plot_team_names', ()),
+    ('plot_popular_names', ()),
+    ('plot_letter_count', ()),
+    ('names_by_cent', ()),
+    ('popular_names_1985_2000', ()),
+    ('popular_names_2000_2015', ()),
+    ('most_popular_year_1985_names', ()),
+    ('most_popular_year_2000_names', ()),
+    ('pop_culture_name', ('Maverick', 1986, 'black')),
+    ('pop_culture_name', ('Khaleesi', 2011, 'black')),
+    ('pop_culture_name', ('Lucy', 1952, 'black')),
+    ('g_name', ()),
+    ('d_name', ()),
+]
+
+# Dataset viewed by each worker process, attached by init_worker to the copy render_all publishes in shared memory
+_df = None
+
+
+def init_worker(handle):
+    global _df
+    _df = attach_frame(handle)
+
+
+# File name stem for one figure, e.g. 'pop_culture_name_Maverick'
+# The first extra argument tells apart the figures of a function drawn more than once (the name for
+# pop_culture_name); the arguments after it only style the figure
+def figure_stem(function, args):
+    return '_'.join([function] + [str(arg) for arg in args[:1]])
+
+
+# Calls one plotting function from main.py and saves every figure it drew into out_dir
+# Figures without axes (e.g. an empty plt.figure() followed by DataFrame.plot) are skipped
+def render_figure(function, args, out_dir, fmt):
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    with warnings.catch_warnings():
+        # plt.show() warns that the Agg backend cannot open windows
+        warnings.simplefilter('ignore', UserWarning)
+        getattr(analyses, function)(_df, *args)
+
+    figures = [plt.figure(number) for number in plt.get_fignums()]
+    figures = [figure for figure in figures if figure.axes]
+
+    stem = figure_stem(function, args)
+    files = []
+    for i, figure in enumerate(figures):
+        suffix = '' if len(figures) == 1 else '_{}'.format(i + 1)
+        file_name = '{}{}.{}'.format(stem, suffix, fmt)
+        figure.savefig(os.path.join(out_dir, file_name))
+        files.append(file_name)
+    plt.close('all')
+
+    return {
+        'figure': stem,
+        'function': function,
+        'args': list(args),
+        'files': files,
+        'seconds': time.perf_counter() - start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'pid': os.getpid(),
+    }
+
+
+# Renders every figure in FIGURES to out_dir across a pool of worker processes
+# states=True reads path as the state-level data; cache_dir defaults to the loader's cache for that kind of data
+# Writes manifest.json with the files and time taken for each figure and returns its contents
+def render_all(out_dir='figures', fmt='png', workers=None, path=DATASET_PATH, cache_dir=None, states=False):
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Load once here and share the columns with the workers instead of loading or pickling them in every worker
+    df = load_names(path, cache_dir, verbose=False, states=states)
+
+    start = time.perf_counter()
+    with SharedFrame(df) as shared, ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                                        initargs=(shared.handle,)) as pool:
+        futures = [pool.submit(render_figure, function, args, out_dir, fmt) for function, args in FIGURES]
+        figures = [future.result() for future in futures]
+
+    manifest = {
+        'format': fmt,
+        'workers': workers or os.cpu_count(),
+        'total_seconds': time.perf_counter() - start,
+        'figures': figures,
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Render every graph from main.py to image files.')
+    parser.add_argument('--out', default='figures', help='output directory')
+    parser.add_argument('--format', default='png', choices=['png', 'svg'], help='image format')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--data', default=DATASET_PATH, help='path to the Excel dataset')
+    parser.add_argument('--states', action='store_true', help='--data is the state-level CSV')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    manifest = render_all(args.out, args.format, args.workers, args.data, states=args.states)
+
+    for figure in manifest['figures']:
+        print('{:<40} {:>7.3f}s  {}'.format(figure['figure'], figure['seconds'], ', '.join(figure['files'])))
+    print('Rendered {} figures in {:.3f}s'.format(len(manifest['figures']), manifest['total_seconds']))
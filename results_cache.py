@@ -0,0 +1,243 @@
+import argparse
+import atexit
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+
+
+RESULTS_DIR = '.results_cache'
+MAX_BYTES = 256 * 1024 * 1024
+
+# Part of every key; bump it to invalidate every cached result when results change in a way the source hashes miss
+CACHE_VERSION = 1
+
+STATS = ['hits', 'misses', 'evictions']
+
+
+# On-disk cache of analysis results keyed by the dataset's content hash, the function and its arguments
+# Each result is a pickle file named by its key; a hit refreshes the file's mtime, and when the directory grows
+# past max_bytes the files used longest ago are evicted first. Hit/miss/eviction counts are counted in memory and
+# added to stats.json by flush(), which runs at exit
+# The key includes the source of the function's module and of every project module it uses, directly or through
+# other modules, so editing the function or any helper behind it invalidates its results
+class ResultsCache:
+    def __init__(self, directory=RESULTS_DIR, max_bytes=MAX_BYTES, enabled=True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+
+        # Counts not yet added to stats.json
+        self.counts = dict.fromkeys(STATS, 0)
+        atexit.register(self.flush)
+
+    # Returns function(df, *args, **kwargs), from the cache when this dataset and these arguments were seen before
+    def call(self, function, df, *args, **kwargs):
+        if not self.enabled:
+            return function(df, *args, **kwargs)
+
+        key = self.key(function, df, args, kwargs)
+        path = os.path.join(self.directory, key + '.pkl')
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    result = pickle.load(f)
+                os.utime(path)
+                self.count('hits')
+                return result
+            except (OSError, EOFError, pickle.UnpicklingError):
+                # A half-written or corrupt entry is treated as a miss and rewritten below
+                pass
+
+        self.count('misses')
+        result = function(df, *args, **kwargs)
+
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        self.evict()
+
+        return result
+
+    # True when call() would answer from the cache without calling function
+    def has(self, function, df, *args, **kwargs):
+        if not self.enabled:
+            return False
+
+        return os.path.exists(os.path.join(self.directory, self.key(function, df, args, kwargs) + '.pkl'))
+
+    def key(self, function, df, args, kwargs):
+        parts = [
+            str(CACHE_VERSION),
+            dataset_fingerprint(df),
+            function.__qualname__,
+            function_source_hash(function),
+            repr(args),
+            repr(sorted(kwargs.items())),
+        ]
+        return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+    # Removes the least recently used entries until the cache fits in max_bytes
+    def evict(self):
+        entries = []
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith('.pkl'):
+                stat = os.stat(os.path.join(self.directory, file_name))
+                entries.append((stat.st_mtime_ns, stat.st_size, file_name))
+
+        total = sum(size for mtime, size, file_name in entries)
+        for mtime, size, file_name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, file_name))
+            except FileNotFoundError:
+                # Already evicted by another process
+                pass
+            total -= size
+            self.count('evictions')
+
+    # Saved counts plus this process's unsaved ones, and the number and size of the entries
+    def stats(self):
+        stats = self.saved_stats()
+        for name in STATS:
+            stats[name] += self.counts[name]
+
+        entries = [name for name in os.listdir(self.directory) if name.endswith('.pkl')] \
+            if os.path.isdir(self.directory) else []
+        stats['entries'] = len(entries)
+        stats['bytes'] = sum(os.path.getsize(os.path.join(self.directory, name)) for name in entries)
+        return stats
+
+    def saved_stats(self):
+        stats = dict.fromkeys(STATS, 0)
+        try:
+            with open(os.path.join(self.directory, 'stats.json')) as f:
+                stats.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+        return stats
+
+    def count(self, stat):
+        self.counts[stat] += 1
+
+    # Adds the unsaved counts to stats.json, replacing it in one step so readers never see a partial file
+    # (two processes flushing at the same moment may still lose one of their updates)
+    def flush(self):
+        if not any(self.counts.values()) or not os.path.isdir(self.directory):
+            return
+
+        stats = self.saved_stats()
+        for name in STATS:
+            stats[name] += self.counts[name]
+
+        path = os.path.join(self.directory, 'stats.json')
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump({name: stats[name] for name in STATS}, f)
+        os.replace(temp_path, path)
+        self.counts = dict.fromkeys(STATS, 0)
+
+    def clear(self):
+        self.counts = dict.fromkeys(STATS, 0)
+        if os.path.isdir(self.directory):
+            for file_name in os.listdir(self.directory):
+                os.remove(os.path.join(self.directory, file_name))
+
+
+# Content hash of a names dataframe: column names, dtypes and values (categorical columns by codes and
+# categories), computed once per dataframe
+def dataset_fingerprint(df):
+    return cached_for_frame(df, 'fingerprint', build_fingerprint)
+
+
+def build_fingerprint(df):
+    digest = hashlib.sha256()
+    for column in df.columns:
+        values = df[column]
+        digest.update('{}:{}'.format(column, values.dtype).encode())
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            digest.update('\0'.join(str(category) for category in values.cat.categories).encode())
+            digest.update(np.ascontiguousarray(values.cat.codes.to_numpy()).tobytes())
+        elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            digest.update('\0'.join(values.astype(str)).encode())
+        else:
+            digest.update(np.ascontiguousarray(values.to_numpy()).tobytes())
+
+    return digest.hexdigest()
+
+
+# Hash of the source of the function's module and of the project modules it depends on (see project_modules)
+@functools.lru_cache(maxsize=None)
+def function_source_hash(function):
+    digest = hashlib.sha256()
+    modules = project_modules(sys.modules.get(function.__module__))
+    if not modules:
+        # Defined outside the project (or interactively): fall back to the function's own code
+        try:
+            digest.update(inspect.getsource(function).encode())
+        except (OSError, TypeError):
+            digest.update(function.__code__.co_code)
+
+    for path in sorted(modules):
+        with open(path, 'rb') as f:
+            digest.update(path.encode() + b'\0' + f.read())
+
+    return digest.hexdigest()
+
+
+# Paths of module and of every module in its directory that it refers to, directly or through the modules it
+# refers to: imported modules and the modules that imported functions and classes were defined in
+def project_modules(module, directory=None, paths=None):
+    paths = set() if paths is None else paths
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return paths
+
+    path = os.path.abspath(path)
+    directory = directory or os.path.dirname(path)
+    if os.path.dirname(path) != directory or path in paths:
+        return paths
+    paths.add(path)
+
+    for value in list(vars(module).values()):
+        name = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+        if isinstance(name, str) and name in sys.modules:
+            project_modules(sys.modules[name], directory, paths)
+
+    return paths
+
+
+# Shared cache used by main.py
+RESULTS_CACHE = ResultsCache()
+
+
+def cached_call(function, df, *args, **kwargs):
+    return RESULTS_CACHE.call(function, df, *args, **kwargs)
+
+
+def is_cached(function, df, *args, **kwargs):
+    return RESULTS_CACHE.has(function, df, *args, **kwargs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Show or clear the analysis results cache.')
+    parser.add_argument('--clear', action='store_true', help='delete every cached result and the statistics')
+    args = parser.parse_args()
+
+    if args.clear:
+        RESULTS_CACHE.clear()
+    for name, value in RESULTS_CACHE.stats().items():
+        print('{:<10} {}'.format(name, value))
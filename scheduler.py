@@ -0,0 +1,162 @@
+import argparse
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import main as analyses
+from aggregates import name_aggregates
+from lengths import length_histogram
+from loader import DATASET_PATH, load_names
+from name_index import name_index
+from name_matrix import name_matrix
+from periods import CENTURIES, period_column, totals_by_period
+from presence import presence_index, sustained_names
+from ranks import rank_table
+from results_cache import is_cached
+
+
+# Shared intermediates, as name -> (function building it from df, intermediates it is built from)
+# Every builder caches its result alongside df (see frame_cache.py), so analyses pick it up without rebuilding
+INTERMEDIATES = {
+    'name_matrix': (name_matrix, []),
+    'name_index': (name_index, []),
+    'rank_table': (rank_table, []),
+    'presence_index': (presence_index, ['name_matrix']),
+    'aggregates': (name_aggregates, []),
+    'century': (lambda df: period_column(df, 'century'), []),
+    'length_histogram': (length_histogram, []),
+}
+
+# Analyses in main() order, as name -> (function in main.py, extra arguments after df, intermediates it reads)
+ANALYSES = {
+    'longest_names': (analyses.longest_names, (), []),
+    'plot_team_names': (analyses.plot_team_names, (), ['name_matrix']),
+    'plot_popular_names': (analyses.plot_popular_names, (), ['name_matrix']),
+    'plot_letter_count': (analyses.plot_letter_count, (), ['length_histogram']),
+    'most_popular_name': (analyses.most_popular_name, (), ['aggregates']),
+    'aggregate_names_by_cent': (analyses.aggregate_names_by_cent, (), ['century']),
+    'records_by_century': (analyses.records_by_century, (), ['century']),
+    'names_by_cent': (analyses.names_by_cent, (), ['presence_index', 'name_matrix']),
+    'most_popular_year_1985_names': (analyses.most_popular_year_1985_names, (), ['rank_table']),
+    'most_popular_year_2000_names': (analyses.most_popular_year_2000_names, (), ['rank_table']),
+    'popular_names_1985_2000': (analyses.popular_names_1985_2000, (), ['name_matrix']),
+    'popular_names_2000_2015': (analyses.popular_names_2000_2015, (), ['name_matrix']),
+    'pop_culture_name_Maverick': (analyses.pop_culture_name, ('Maverick', 1986, 'black'), ['name_index']),
+    'pop_culture_name_Khaleesi': (analyses.pop_culture_name, ('Khaleesi', 2011, 'black'), ['name_index']),
+    'pop_culture_name_Lucy': (analyses.pop_culture_name, ('Lucy', 1952, 'black'), ['name_index']),
+    'g_name': (analyses.g_name, (), ['name_index']),
+    'd_name': (analyses.d_name, (), ['name_index']),
+}
+
+# Tables analyses read through cached_call, as name -> [(function, arguments after df)]
+# When every table of an analysis is already in .results_cache it reads none of its intermediates, so they are
+# not built for it (were an entry evicted before the analysis runs, it would build what it needs itself)
+CACHED_TABLES = {
+    'most_popular_name': [(analyses.popular_name_tables, ())],
+    'aggregate_names_by_cent': [(totals_by_period, (['name'], 'century'))],
+    'records_by_century': [(totals_by_period, (['sex'], 'century'))],
+    'names_by_cent': [(sustained_names, ((first, last), 10)) for century, first, last in CENTURIES],
+}
+
+
+# Intermediates one analysis reads on df: none when all its cached tables are hits, its declared ones otherwise
+def analysis_dependencies(df, name):
+    tables = CACHED_TABLES.get(name)
+    if tables and all(is_cached(function, df, *args) for function, args in tables):
+        return []
+
+    return ANALYSES[name][2]
+
+
+# Every intermediate the given analyses need, including the intermediates those are built from
+# dependencies maps each analysis to the intermediates it reads (default: the ones ANALYSES declares)
+def required_intermediates(names, dependencies=None):
+    if dependencies is None:
+        dependencies = {name: ANALYSES[name][2] for name in names}
+
+    required = set()
+    stack = [dependency for name in names for dependency in dependencies[name]]
+    while stack:
+        name = stack.pop()
+        if name not in required:
+            required.add(name)
+            stack.extend(INTERMEDIATES[name][1])
+
+    return required
+
+
+# Runs the named analyses on df, building only the intermediates they need, each exactly once
+# Intermediates are built concurrently in a pool of worker threads as soon as what they are built from is ready.
+# Analyses run one at a time on the calling thread, because pyplot and the printed tables are not safe to share
+# between threads; whenever several are ready the one listed first runs first (render.py draws every figure
+# across a process pool instead). Analyses answered from .results_cache get none of their intermediates built
+# Returns the seconds spent on every task
+def run_tasks(df, names, workers=None):
+    unknown = [name for name in names if name not in ANALYSES]
+    if unknown:
+        raise KeyError('Unknown analyses: {}'.format(', '.join(unknown)))
+
+    dependencies = {name: analysis_dependencies(df, name) for name in names}
+    pending = required_intermediates(names, dependencies)
+    remaining = list(names)
+    done = set()
+    running = {}
+    timings = {}
+
+    def build(name):
+        start = time.perf_counter()
+        INTERMEDIATES[name][0](df)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running or remaining:
+            for name in sorted(pending):
+                if set(INTERMEDIATES[name][1]) <= done:
+                    pending.remove(name)
+                    running[pool.submit(build, name)] = name
+
+            ready = [name for name in remaining if set(dependencies[name]) <= done]
+            if ready:
+                name = ready[0]
+                remaining.remove(name)
+                function, args = ANALYSES[name][:2]
+                start = time.perf_counter()
+                function(df, *args)
+                timings[name] = time.perf_counter() - start
+                continue
+
+            finished = wait(running, return_when=FIRST_COMPLETED).done
+            for future in finished:
+                name = running.pop(future)
+                timings[name] = future.result()
+                done.add(name)
+
+    return timings
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Run selected baby names analyses and only what they depend on. Shared intermediates are built '
+                    'in parallel threads; the analyses themselves run one after another (use render.py to draw '
+                    'figures in parallel processes).')
+    parser.add_argument('--only', help='comma-separated analyses to run (default: all, in main() order)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='threads for building intermediates (analyses always run one at a time)')
+    parser.add_argument('--data', default=DATASET_PATH, help='path to the Excel dataset')
+    parser.add_argument('--list', action='store_true', help='list the analyses and what they depend on')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.list:
+        for name, (function, function_args, dependencies) in ANALYSES.items():
+            print('{:<30} {}'.format(name, ', '.join(sorted(required_intermediates([name]))) or '-'))
+    else:
+        selected = args.only.split(',') if args.only else list(ANALYSES)
+        df = load_names(args.data)
+        timings = run_tasks(df, [name.strip() for name in selected], args.workers)
+
+        print('\nTask timings:')
+        for name, seconds in timings.items():
+            print('{:<30} {:>8.3f}s'.format(name, seconds))
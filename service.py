@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import json
+import time
+import traceback
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from loader import DATASET_PATH, load_names
+from name_matrix import name_matrix
+from periods import NAMED_PERIODS, totals_by_period
+from ranks import rank_table
+
+
+HOST = '127.0.0.1'
+PORT = 8050
+CACHE_SIZE = 4096
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error'}
+
+
+# JSON over HTTP queries answered from the in-memory count matrix, rank table and period totals
+# GET /series?names=Michael,Jessica&start=1985&end=2000[&sex=M]   yearly counts, as popular_names_1985_2000
+# GET /top?year=1985[&k=10][&sex=F]                               top names of a year, as most_popular_year_names
+# GET /periods[?by=sex][&periods=century]                         totals by century and sex, as records_by_century
+# GET /periods?by=name&names=Mary,Linda[&periods=century]         totals by century for names, as
+#                                                                 aggregate_names_by_cent
+# GET /stats                                                      request and response cache counts
+# Successful responses are kept in an LRU cache of cache_size entries keyed by path and sorted query parameters
+class NamesService:
+    def __init__(self, df, cache_size=CACHE_SIZE):
+        self.df = df
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'cache_misses': 0, 'errors': 0}
+        self.period_totals = {}
+
+        self.routes = {
+            '/series': self.series,
+            '/top': self.top,
+            '/periods': self.periods,
+            '/stats': self.service_stats,
+        }
+
+        # Build the shared structures up front so no request pays for them
+        self.matrix = name_matrix(df)
+        self.ranks = rank_table(df)
+        for by in ['sex', 'name']:
+            self.totals('century', by)
+
+    # Status and encoded JSON body for a request target such as '/top?year=1985'
+    def respond(self, target):
+        self.stats['requests'] += 1
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        key = (url.path, tuple(sorted(params.items())))
+
+        if url.path != '/stats' and key in self.cache:
+            self.cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return 200, self.cache[key]
+
+        route = self.routes.get(url.path)
+        if route is None:
+            self.stats['errors'] += 1
+            return 404, encode({'error': 'Unknown path: {}'.format(url.path)})
+
+        try:
+            body = encode(route(params))
+        except KeyError as e:
+            self.stats['errors'] += 1
+            return 404, encode({'error': e.args[0] if e.args else str(e)})
+        except ValueError as e:
+            self.stats['errors'] += 1
+            return 400, encode({'error': str(e)})
+        except Exception as e:
+            # Any other failure is answered too, so the connection and the client's other requests carry on
+            traceback.print_exc()
+            self.stats['errors'] += 1
+            return 500, encode({'error': 'Internal error: {}'.format(type(e).__name__)})
+
+        if url.path != '/stats':
+            self.stats['cache_misses'] += 1
+            self.cache[key] = body
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return 200, body
+
+    def series(self, params):
+        names = name_list(params)
+        year_df = self.matrix.frame(names, sex=sex_param(params),
+                                    years=(int_param(params, 'start'), int_param(params, 'end')))
+        return {
+            'years': year_df.index.tolist(),
+            'series': {name: year_df[name].tolist() for name in names},
+        }
+
+    def top(self, params):
+        year = int_param(params, 'year')
+        if year is None:
+            raise ValueError('Missing parameter: year')
+
+        top_df = self.ranks.top(year, int_param(params, 'k', 10), sex_param(params))
+        return {'year': year, 'names': records(top_df)}
+
+    def periods(self, params):
+        periods = params.get('periods', 'century')
+        if periods not in NAMED_PERIODS and periods != 'decade':
+            raise ValueError('Unknown periods: {}'.format(periods))
+
+        by = params.get('by', 'sex')
+        if by not in ('sex', 'name'):
+            raise ValueError('by must be sex or name')
+
+        totals_df = self.totals(periods, by)
+        if by == 'name':
+            totals_df = totals_df[totals_df['name'].isin(name_list(params))]
+
+        return {'periods': periods, 'totals': records(totals_df)}
+
+    def service_stats(self, params):
+        return dict(self.stats, cache_entries=len(self.cache))
+
+    # Totals by period and sex or name, computed once per combination
+    def totals(self, periods, by):
+        if (periods, by) not in self.period_totals:
+            self.period_totals[(periods, by)] = totals_by_period(self.df, [by], periods)
+
+        return self.period_totals[(periods, by)]
+
+    # Serves HTTP/1.1 with keep-alive until cancelled
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.client, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def client(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    break
+                method, target, version = parts
+
+                if method != 'GET':
+                    status, body = 405, encode({'error': 'Only GET is supported'})
+                else:
+                    status, body = self.respond(target)
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n'
+                             'Connection: {}\r\n\r\n'.format(status, STATUS_TEXT[status], len(body),
+                                                             'keep-alive' if keep_alive else 'close')
+                             .encode('latin-1') + body)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def encode(payload):
+    return json.dumps(payload).encode()
+
+
+# Rows of a dataframe as JSON-ready dicts
+def records(df):
+    return [{column: value.item() if hasattr(value, 'item') else value for column, value in row.items()}
+            for row in df.astype(object).to_dict('records')]
+
+
+# Names of a comma-separated names parameter, each once, in the order first given
+def name_list(params):
+    if not params.get('names'):
+        raise ValueError('Missing parameter: names')
+
+    return list(dict.fromkeys(name.strip() for name in params['names'].split(',')))
+
+
+def int_param(params, name, default=None):
+    if name not in params:
+        return default
+
+    try:
+        return int(params[name])
+    except ValueError:
+        raise ValueError('{} must be an integer'.format(name))
+
+
+def sex_param(params):
+    sex = params.get('sex')
+    if sex not in (None, 'M', 'F'):
+        raise ValueError('sex must be M or F')
+
+    return sex
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve baby names queries as JSON over HTTP.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help='responses kept in the response cache')
+    parser.add_argument('--data', default=DATASET_PATH, help='path to the Excel dataset')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    start = time.perf_counter()
+    service = NamesService(load_names(args.data), args.cache_size)
+    print('Ready in {:.2f}s, serving on http://{}:{}'.format(time.perf_counter() - start, args.host, args.port))
+
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,231 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lengths import LengthHistogram
+from loader import DATASET_PATH, load_names
+from name_matrix import encode
+from periods import CENTURIES, bucket_years
+
+
+# The aggregates behind most_popular_name, aggregate_names_by_cent, records_by_century and plot_letter_count,
+# computed over shards of the rows in a process pool
+# Every shard is reduced to partials indexed by the dataset's global name/sex codes: totals by (sex, name),
+# (century, sex) and (century, name), a (sex, year, length) birth histogram, and which (sex, name, year)
+# combinations have rows. Shards of whole years never share a year, so they count the years each (sex, name)
+# appears in themselves and those counts merge by adding; shards of whole states can share every combination,
+# so they return it as a bitset and the bitsets merge by OR. Either way the parent's work depends on the number
+# of names and years rather than the rows, and the merged result is exactly the single-process one
+
+
+# Integer columns of one shard and the sizes of the global code spaces
+def shard_columns(df):
+    name_codes, names = encode(df['name'])
+    sex_codes, sexes = encode(df['sex'])
+    year = df['year'].to_numpy().astype(np.int64)
+    first_year = int(year.min())
+
+    columns = {
+        'year': year - first_year,
+        'century': np.asarray(bucket_years(year, CENTURIES).codes, dtype=np.int64),
+        'name_codes': name_codes.astype(np.int64),
+        'sex_codes': sex_codes.astype(np.int64),
+        'letter_count': df['letter_count'].to_numpy().astype(np.int64),
+        'count': df['count'].to_numpy().astype(np.int64),
+    }
+    shape = {
+        'names': len(names),
+        'sexes': len(sexes),
+        'years': int(year.max()) - first_year + 1,
+        'centuries': len(CENTURIES),
+        'width': int(columns['letter_count'].max()) + 1,
+    }
+    return columns, shape, names, sexes, first_year
+
+
+# Partial aggregates of one shard (runs in a worker process)
+# whole_years says no other shard has rows for this shard's years
+def aggregate_shard(columns, shape, whole_years=True):
+    name, sex, year = columns['name_codes'], columns['sex_codes'], columns['year']
+    century, count = columns['century'], columns['count']
+
+    def totals(index, size):
+        return np.bincount(index, weights=count, minlength=size).astype(np.int64)
+
+    sex_name = sex * shape['names'] + name
+    present = np.zeros((shape['sexes'] * shape['names'], shape['years']), dtype=bool)
+    present[sex_name, year] = True
+
+    partial = {
+        'rows': len(count),
+        'name_totals': totals(sex_name, shape['sexes'] * shape['names']),
+        'century_sex': totals(century * shape['sexes'] + sex, shape['centuries'] * shape['sexes']),
+        'century_name': totals(century * shape['names'] + name, shape['centuries'] * shape['names']),
+        'lengths': totals((sex * shape['years'] + year) * shape['width'] + columns['letter_count'],
+                          shape['sexes'] * shape['years'] * shape['width']),
+    }
+    if whole_years:
+        partial['appearances'] = present.sum(axis=1, dtype=np.int64)
+        partial['years_present'] = present.any(axis=0)
+    else:
+        partial['present_bits'] = np.packbits(present)
+
+    return partial
+
+
+def merge_partials(partials, shape):
+    merged = {}
+    for key in ['rows', 'name_totals', 'century_sex', 'century_name', 'lengths']:
+        merged[key] = sum(partial[key] for partial in partials)
+
+    if 'present_bits' in partials[0]:
+        bits = np.bitwise_or.reduce([partial['present_bits'] for partial in partials])
+        size = shape['sexes'] * shape['names'] * shape['years']
+        present = np.unpackbits(bits, count=size).view(bool).reshape(-1, shape['years'])
+        merged['appearances'] = present.sum(axis=1, dtype=np.int64)
+        merged['years_present'] = present.any(axis=0)
+    else:
+        merged['appearances'] = sum(partial['appearances'] for partial in partials)
+        merged['years_present'] = np.logical_or.reduce([partial['years_present'] for partial in partials])
+
+    return merged
+
+
+# Splits the rows into at most n shards
+# by='year' keeps every year in one shard and by='state' every state, assigning the largest years/states first
+# to the shard with the fewest rows so far
+def split_rows(df, by, n):
+    keys, labels = encode(df[by]) if by == 'state' else pd.factorize(df['year'], sort=True)
+    sizes = np.bincount(keys, minlength=len(labels))
+
+    loads = np.zeros(n, dtype=np.int64)
+    shard_of_key = np.zeros(len(labels), dtype=np.int64)
+    for key in np.argsort(-sizes, kind='stable'):
+        shard = int(loads.argmin())
+        shard_of_key[key] = shard
+        loads[shard] += sizes[key]
+
+    shard_of_row = shard_of_key[keys]
+    order = np.argsort(shard_of_row, kind='stable')
+    bounds = np.searchsorted(shard_of_row[order], np.arange(1, n))
+    return [rows for rows in np.split(order, bounds) if len(rows)]
+
+
+# Aggregates df over shards in a pool of worker processes (workers=1 aggregates in this process, unsharded)
+# Returns a dict with the same tables main.py prints: name totals, every-year names and top names by sex,
+# totals by century and sex / century and name, and the length histogram behind plot_letter_count
+def sharded_aggregates(df, by='year', workers=None, top=50):
+    if by == 'state' and 'state' not in df:
+        raise ValueError('by="state" needs the state-level data (a state column)')
+
+    workers = workers or os.cpu_count()
+    columns, shape, names, sexes, first_year = shard_columns(df)
+
+    if workers == 1:
+        partials = [aggregate_shard(columns, shape)]
+    else:
+        shards = split_rows(df, by, workers)
+        whole_years = by == 'year'
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(aggregate_shard, {key: values[rows] for key, values in columns.items()}, shape,
+                                   whole_years) for rows in shards]
+            partials = [future.result() for future in futures]
+
+    return results_from_partials(merge_partials(partials, shape), shape, names, sexes, first_year, top)
+
+
+def results_from_partials(merged, shape, names, sexes, first_year, top):
+    n_names, n_years = shape['names'], shape['years']
+    names = np.asarray(names, dtype=object)
+    appearances = merged['appearances']
+
+    # Years from the first to the last year any row has
+    years_present = np.flatnonzero(merged['years_present'])
+    span = int(years_present[-1] - years_present[0] + 1)
+
+    codes = np.flatnonzero(appearances)
+    name_totals = pd.DataFrame({
+        'name': names[codes % n_names],
+        'sex': np.asarray(sexes, dtype=object)[codes // n_names],
+        'count': merged['name_totals'][codes],
+        'appearances': appearances[codes],
+    })
+
+    every_year_names = {}
+    top_names = {}
+    for s, sex in enumerate(sexes):
+        sex_totals = name_totals[name_totals['sex'] == sex]
+        every_year_names[sex] = sorted(sex_totals.loc[sex_totals['appearances'] == span, 'name'])
+
+        top_df = sex_totals.sort_values(['count', 'name'], ascending=[False, True])[:top]
+        top_df = top_df[['name', 'count']].reset_index(drop=True)
+        top_df.index = top_df.index + 1
+        top_names[sex] = top_df
+
+    return {
+        'rows': merged['rows'],
+        'name_totals': name_totals,
+        'every_year_names': every_year_names,
+        'top_names': top_names,
+        'century_sex_totals': period_frame(merged['century_sex'], 'sex', sexes),
+        'century_name_totals': period_frame(merged['century_name'], 'name', names),
+        'lengths': LengthHistogram(np.arange(first_year, first_year + n_years), list(sexes),
+                                   merged['lengths'].reshape(len(sexes), n_years, shape['width'])),
+    }
+
+
+# A flat (century, label) totals array as the frame totals_by_period returns: observed combinations only,
+# in century then label order
+def period_frame(totals, column, labels):
+    totals = totals.reshape(len(CENTURIES), len(labels))
+    century, label = np.nonzero(totals)
+    centuries = [century_label for century_label, first, last in CENTURIES]
+
+    return pd.DataFrame({
+        'century': pd.Categorical.from_codes(century, categories=centuries, ordered=True),
+        column: pd.Categorical.from_codes(label, categories=pd.Index(labels, dtype=object)),
+        'count': totals[century, label],
+    })
+
+
+# True when two sharded_aggregates results hold the same values
+def same_results(a, b):
+    return (a['rows'] == b['rows']
+            and a['name_totals'].equals(b['name_totals'])
+            and a['every_year_names'] == b['every_year_names']
+            and all(a['top_names'][sex].equals(b['top_names'][sex]) for sex in a['top_names'])
+            and a['century_sex_totals'].equals(b['century_sex_totals'])
+            and a['century_name_totals'].equals(b['century_name_totals'])
+            and np.array_equal(a['lengths'].counts, b['lengths'].counts))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compute the main.py aggregates over shards in a process pool.')
+    parser.add_argument('--data', default=DATASET_PATH, help='national Excel workbook or state-level CSV')
+    parser.add_argument('--states', action='store_true', help='--data is the state-level CSV')
+    parser.add_argument('--by', choices=['year', 'state'], default='year', help='what each shard holds whole')
+    parser.add_argument('--workers', default=str(os.cpu_count()),
+                        help='comma-separated worker counts to time, checked against a single-process run')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    df = load_names(args.data, states=args.states)
+
+    start = time.perf_counter()
+    expected = sharded_aggregates(df, args.by, workers=1)
+    single = time.perf_counter() - start
+    print('{:>3} worker(s) {:>8.3f}s  {:>12,.0f} rows/s'.format(1, single, len(df) / single))
+
+    for workers in [int(workers) for workers in args.workers.split(',')]:
+        start = time.perf_counter()
+        result = sharded_aggregates(df, args.by, workers)
+        seconds = time.perf_counter() - start
+        print('{:>3} worker(s) {:>8.3f}s  {:>12,.0f} rows/s  speedup {:.2f}x  {}'.format(
+            workers, seconds, len(df) / seconds, single / seconds,
+            'matches' if same_results(expected, result) else 'DIFFERS from the single-process result'))
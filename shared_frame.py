@@ -0,0 +1,215 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from loader import DATASET_PATH, frame_from_columns, load_names
+from name_matrix import encode
+from synthetic import synthetic_names
+
+
+# Every column starts at a multiple of this many bytes in the shared block
+ALIGNMENT = 64
+
+# Blocks attached by this process, kept open for as long as the frames viewing them may be in use
+_attached = {}
+
+
+# What a worker needs to find a published frame: the shared memory block's name and where each column sits in it
+# It pickles to a few hundred bytes whatever the size of the dataset
+class SharedFrameHandle:
+    def __init__(self, name, layout):
+        self.name = name
+        # column -> (dtype string, shape, byte offset)
+        self.layout = layout
+
+
+# A names dataframe copied once into a shared memory block that any number of processes can view without copying
+# The publishing process owns the block: close() (or leaving a with block) frees it, so it must outlive the workers
+class SharedFrame:
+    def __init__(self, df):
+        columns = frame_arrays(df)
+
+        layout = {}
+        size = 0
+        for column, values in columns.items():
+            layout[column] = (values.dtype.str, values.shape, size)
+            size += -(-values.nbytes // ALIGNMENT) * ALIGNMENT
+
+        self.block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.handle = SharedFrameHandle(self.block.name, layout)
+        for column, view in block_arrays(self.block, layout).items():
+            view[...] = columns[column]
+
+    def close(self):
+        self.block.close()
+        self.block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# The compact columns of a names dataframe as arrays: integer codes for name/sex/state plus their vocabularies
+def frame_arrays(df):
+    name_codes, names = encode(df['name'])
+    sex_codes, sexes = encode(df['sex'])
+
+    columns = {
+        'year': df['year'].to_numpy().astype(np.int16, copy=False),
+        'name_codes': name_codes.astype(code_dtype(names), copy=False),
+        'sex_codes': sex_codes.astype(code_dtype(sexes), copy=False),
+        'count': df['count'].to_numpy().astype(np.int32, copy=False),
+        'letter_count': df['letter_count'].to_numpy().astype(np.uint8, copy=False),
+        'names': np.asarray(names, dtype=str),
+        'sexes': np.asarray(sexes, dtype=str),
+    }
+    if 'state' in df:
+        state_codes, states = encode(df['state'])
+        columns['state_codes'] = state_codes.astype(code_dtype(states), copy=False)
+        columns['states'] = np.asarray(states, dtype=str)
+
+    return columns
+
+
+# The integer type pandas stores categorical codes in for this many categories; codes published in it are used
+# by the attached frame's categoricals as they are, anything else would be copied into it
+def code_dtype(categories):
+    for dtype in [np.int8, np.int16, np.int32]:
+        if len(categories) < np.iinfo(dtype).max:
+            return dtype
+
+    return np.int64
+
+
+def block_arrays(block, layout):
+    return {column: np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            for column, (dtype, shape, offset) in layout.items()}
+
+
+# Opens a published block in this process without letting this process's exit free it
+def attach_block(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # Before Python 3.13 attaching registers the block with the resource tracker as if this process owned it,
+    # and the tracker is shared with the publishing process, so registration is switched off while attaching
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+# The compact dataframe behind a handle, as read-only views of the shared block (only the vocabularies are copied)
+def attach_frame(handle):
+    if handle.name not in _attached:
+        _attached[handle.name] = attach_block(handle.name)
+
+    columns = block_arrays(_attached[handle.name], handle.layout)
+    for values in columns.values():
+        values.flags.writeable = False
+
+    return frame_from_columns(columns, copy=False)
+
+
+# Memory of this process from /proc (Linux): resident set size and the part of it not shared with other processes
+def process_memory():
+    memory = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            field, _, value = line.partition(':')
+            if field in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                memory[field] = int(value.split()[0]) / 1024
+
+    return {'rss_mb': memory['Rss'], 'private_mb': memory['Private_Clean'] + memory['Private_Dirty']}
+
+
+# Worker side of compare_startup: gets the dataset the way mode says and records how long that took
+_worker = {}
+
+
+def init_probe(mode, payload, barrier):
+    start = time.perf_counter()
+    if mode == 'pickle':
+        df = payload
+    elif mode == 'load':
+        df = load_names(payload, verbose=False)
+    else:
+        df = attach_frame(payload)
+
+    _worker['df'] = df
+    _worker['init_seconds'] = time.perf_counter() - start
+    _worker['barrier'] = barrier
+
+
+# Touches every row, waits for every other worker so each worker answers exactly once, and reports
+def probe(i):
+    df = _worker['df']
+    total = int(df['count'].sum()) + int(df['year'].sum()) + int(df['letter_count'].sum()) + \
+        int(df['name'].cat.codes.sum()) + int(df['sex'].cat.codes.sum())
+    _worker['barrier'].wait()
+
+    return dict(process_memory(), init_seconds=_worker['init_seconds'], total=total)
+
+
+# Starts a fresh pool of workers for each way of getting the dataset into them and measures it:
+# pickle sends the dataframe to every worker, load reads it from the loader's .npy cache in every worker (needs a
+# dataset path) and shared attaches the block published by SharedFrame
+# Returns mode -> pool start-up seconds, worker init seconds, and mean worker RSS and private memory
+def compare_startup(df, workers, path=None, start_method='spawn'):
+    context = multiprocessing.get_context(start_method)
+    modes = ['pickle'] + (['load'] if path else []) + ['shared']
+
+    results = {}
+    with SharedFrame(df) as shared:
+        payloads = {'pickle': df, 'load': path, 'shared': shared.handle}
+        for mode in modes:
+            barrier = context.Barrier(workers)
+            start = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_probe,
+                                     initargs=(mode, payloads[mode], barrier)) as pool:
+                probes = list(pool.map(probe, [None] * workers))
+            elapsed = time.perf_counter() - start
+
+            results[mode] = {
+                'startup_seconds': elapsed,
+                'init_seconds': float(np.mean([result['init_seconds'] for result in probes])),
+                'rss_mb': float(np.mean([result['rss_mb'] for result in probes])),
+                'private_mb': float(np.mean([result['private_mb'] for result in probes])),
+            }
+
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compare ways of getting the dataset into worker processes.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--data', default=DATASET_PATH, help='dataset to load (used if it exists)')
+    parser.add_argument('--scale', type=float, help='use synthetic data at this multiple of the real size instead')
+    parser.add_argument('--start-method', default='spawn', choices=multiprocessing.get_all_start_methods())
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.scale is not None or not os.path.exists(args.data):
+        df, path = synthetic_names(args.scale or 1.0), None
+    else:
+        df, path = load_names(args.data), args.data
+
+    print('{} rows, {} workers, {} start method'.format(len(df), args.workers, args.start_method))
+    print('{:<8} {:>12} {:>14} {:>10} {:>12}'.format('mode', 'pool start s', 'worker init s', 'RSS MB',
+                                                     'private MB'))
+    for mode, result in compare_startup(df, args.workers, path, args.start_method).items():
+        print('{:<8} {:>12.3f} {:>14.4f} {:>10.1f} {:>12.1f}'.format(
+            mode, result['startup_seconds'], result['init_seconds'], result['rss_mb'], result['private_mb']))
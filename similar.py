@@ -0,0 +1,147 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from frame_cache import cached_for_frame
+from loader import DATASET_PATH, load_names
+from name_matrix import name_matrix
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+
+# Dimensions kept by the approximate index, and how many candidates per requested name it re-scores exactly
+COMPONENTS = 16
+OVERSAMPLE = 10
+
+
+# Every name's popularity curve as a unit vector over the years, for nearest-curve queries
+# A curve is the name's share of each year's births; with metric='correlation' each curve is centred on its mean
+# before normalising, so the dot product of two vectors is their correlation, with metric='cosine' it is their
+# cosine similarity. vectors[i] belongs to names[i]; names nobody was given have a zero vector
+class TrajectoryIndex:
+    def __init__(self, names, vectors, totals):
+        self.names = names
+        self.vectors = vectors
+        self.totals = totals
+
+        # name -> row of vectors
+        self.rows = {name: i for i, name in enumerate(names)}
+
+        # Built on the first approximate query, see build_approximate
+        self.mean = None
+        self.components = None
+        self.reduced = None
+        self.mean_scores = None
+        self.tree = None
+
+    # The k names whose curves are most similar to name's, as a dataframe with columns name, similarity and count
+    # Only names given to at least min_count babies are considered, which keeps one-off spikes out of the results
+    # approximate=True scores names in a PCA-reduced space (through a KD-tree when SciPy is installed)
+    # and re-scores the best k * OVERSAMPLE of them exactly
+    def similar(self, name, k=20, min_count=0, approximate=False):
+        if name not in self.rows:
+            raise KeyError('Name not in dataset: {}'.format(name))
+
+        row = self.rows[name]
+        query = self.vectors[row]
+
+        if approximate:
+            candidates = self.approximate_candidates(query, k * OVERSAMPLE + 1)
+            scores = self.vectors[candidates] @ query
+        else:
+            candidates = np.arange(len(self.names))
+            scores = self.vectors @ query
+
+        keep = (candidates != row) & (self.totals[candidates] >= max(min_count, 1))
+        candidates, scores = candidates[keep], scores[keep]
+
+        if len(candidates) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            candidates, scores = candidates[best], scores[best]
+        order = np.lexsort((candidates, -scores))
+
+        return pd.DataFrame({
+            'name': [self.names[i] for i in candidates[order]],
+            'similarity': scores[order].astype(np.float64),
+            'count': self.totals[candidates[order]],
+        })
+
+    # Rows of the n names nearest to query in the reduced space
+    def approximate_candidates(self, query, n):
+        if self.components is None:
+            self.build_approximate()
+
+        reduced_query = (query - self.mean) @ self.components
+        n = min(n, len(self.names))
+        if self.tree is not None:
+            return self.tree.query(reduced_query, k=n)[1].reshape(-1)
+
+        # v . q = (v - mean) . (q - mean) + mean . v + mean . q - mean . mean, with the first term read off the
+        # reduced vectors; the terms that do not depend on v are left out since only the order matters
+        scores = self.reduced @ reduced_query + self.mean_scores
+        return np.argpartition(-scores, n - 1)[:n]
+
+    # Principal components of the curves (eigenvectors of their year x year covariance) and every curve projected
+    # onto the first COMPONENTS of them
+    def build_approximate(self, components=COMPONENTS):
+        self.mean = self.vectors.mean(axis=0)
+        centred = self.vectors - self.mean
+        eigenvalues, eigenvectors = np.linalg.eigh(centred.T @ centred)
+        self.components = eigenvectors[:, ::-1][:, :components].astype(np.float32)
+        self.reduced = centred @ self.components
+        self.mean_scores = self.vectors @ self.mean
+        if cKDTree is not None:
+            self.tree = cKDTree(self.reduced)
+
+
+def build_trajectory_index(df, sex=None, metric='correlation'):
+    if metric not in ('correlation', 'cosine'):
+        raise ValueError('metric must be correlation or cosine')
+
+    matrix = name_matrix(df)
+    counts = matrix.sex_counts(sex)
+    if sex is None:
+        counts = counts.sum(axis=0)
+
+    births = counts.sum(axis=1, keepdims=True)
+    shares = (counts / np.maximum(births, 1)).astype(np.float32).T
+    if metric == 'correlation':
+        shares -= shares.mean(axis=1, keepdims=True)
+
+    norms = np.linalg.norm(shares, axis=1, keepdims=True)
+    vectors = np.divide(shares, norms, out=np.zeros_like(shares), where=norms > 0)
+
+    return TrajectoryIndex(matrix.names, vectors, counts.sum(axis=0).astype(np.int64))
+
+
+# Returns the curve index for this dataframe, sex and metric, building it on first use
+def trajectory_index(df, sex=None, metric='correlation'):
+    return cached_for_frame(df, ('trajectories', sex, metric), lambda frame: build_trajectory_index(frame, sex, metric))
+
+
+# Names whose popularity over the years follows name's most closely, e.g. similar_names(df, 'Jennifer', k=20)
+def similar_names(df, name, k=20, sex=None, metric='correlation', min_count=0, approximate=False):
+    return trajectory_index(df, sex, metric).similar(name, k, min_count, approximate)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Find names whose popularity curve matches a given name.')
+    parser.add_argument('name')
+    parser.add_argument('-k', type=int, default=20, help='names to list')
+    parser.add_argument('--sex', choices=['M', 'F'], help='only count babies of this sex')
+    parser.add_argument('--metric', choices=['correlation', 'cosine'], default='correlation')
+    parser.add_argument('--min-count', type=int, default=1000, help='births a name needs to be listed')
+    parser.add_argument('--approximate', action='store_true', help='use the PCA-reduced index')
+    parser.add_argument('--data', default=DATASET_PATH, help='path to the Excel dataset')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    df = load_names(args.data)
+    print(similar_names(df, args.name, args.k, args.sex, args.metric, args.min_count, args.approximate)
+          .to_string(float_format='{:.4f}'.format))
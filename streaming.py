@@ -0,0 +1,150 @@
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregates import read_year_file
+from periods import CENTURIES, bucket_years
+
+
+# Yields one names dataframe (columns year, name, sex, count) per SSA yobYYYY.txt file in directory, oldest first
+def iter_year_files(directory, pattern='yob*.txt'):
+    for path in sorted(glob.glob(os.path.join(directory, pattern))):
+        yield read_year_file(path)
+
+
+# Yields a large CSV file in chunks of at most chunksize rows
+# names gives the column names of a file without a header row, e.g. the SSA state files
+# ['state', 'sex', 'year', 'name', 'count']; columns other than year, name, sex and count are ignored
+def iter_csv(path, names=None, chunksize=500000):
+    reader = pd.read_csv(path, names=names, header=None if names else 'infer', chunksize=chunksize,
+                         usecols=['year', 'name', 'sex', 'count'],
+                         dtype={'year': np.int16, 'name': str, 'sex': str, 'count': np.int32})
+    for chunk in reader:
+        yield chunk
+
+
+# Aggregates used by main.py, computed over a stream of chunks:
+# totals by name and sex, mean letter count of the babies born each year, totals by century and sex / century and name,
+# and the top names of every year
+# Memory depends on the number of distinct names, not on the number of rows read. With ordered_by_year, per-year
+# name totals are only held until the stream moves past that year, so at most one year is open at a time;
+# input in any other order (the SSA state files run state by state) has to set it to False, which keeps every
+# year open until the end of the stream
+class StreamingAggregates:
+    def __init__(self, top_k=10, ordered_by_year=True):
+        self.top_k = top_k
+        self.ordered_by_year = ordered_by_year
+        self.rows = 0
+
+        # Running totals as Series, None until the first chunk arrives
+        self.name_totals = None
+        self.letter_sums = None
+        self.letter_births = None
+        self.century_sex_totals = None
+        self.century_name_totals = None
+
+        # year -> name totals for years that may still get more rows
+        self.open_years = {}
+        self.top_names = []
+
+        # Years before this one have been ranked and closed
+        self.closed_before = None
+
+    def update(self, chunk):
+        # Checked before any total changes, so a rejected chunk leaves the aggregates as they were
+        if self.closed_before is not None and chunk['year'].min() < self.closed_before:
+            raise ValueError('Rows for year {} arrived after that year was closed; pass ordered_by_year=False '
+                             'for input not sorted by year'.format(chunk['year'].min()))
+
+        self.rows += len(chunk)
+
+        self.name_totals = add_totals(self.name_totals, chunk.groupby(['name', 'sex'])['count'].sum())
+
+        letters = chunk['name'].str.len() * chunk['count']
+        self.letter_sums = add_totals(self.letter_sums, letters.groupby(chunk['year']).sum())
+        self.letter_births = add_totals(self.letter_births, chunk.groupby('year')['count'].sum())
+
+        century = pd.Series(bucket_years(chunk['year'], CENTURIES), index=chunk.index, name='century')
+        self.century_sex_totals = add_totals(
+            self.century_sex_totals, chunk.groupby([century, chunk['sex']], observed=True)['count'].sum())
+        self.century_name_totals = add_totals(
+            self.century_name_totals, chunk.groupby([century, chunk['name']], observed=True)['count'].sum())
+
+        year_name_totals = chunk.groupby(['year', 'name'])['count'].sum()
+        for year, year_totals in year_name_totals.groupby(level='year'):
+            year_totals = year_totals.droplevel('year')
+            if year in self.open_years:
+                year_totals = add_totals(self.open_years[year], year_totals)
+            self.open_years[year] = year_totals
+
+        # Rows come in year order in the national SSA files, so every year before this chunk's first year is complete
+        if self.ordered_by_year:
+            self.close_years(before=chunk['year'].min())
+
+    def close_years(self, before=None):
+        if before is not None:
+            self.closed_before = before
+        for year in sorted(self.open_years):
+            if before is not None and year >= before:
+                break
+            top = self.open_years.pop(year).nlargest(self.top_k)
+            for rank, (name, count) in enumerate(top.items(), start=1):
+                self.top_names.append((int(year), rank, name, int(count)))
+
+    # Finishes the stream and returns every aggregate as a dataframe
+    def results(self):
+        self.close_years()
+
+        letter_df = (self.letter_sums / self.letter_births).to_frame(name='avg_letter_count')
+        letter_df.index.name = 'year'
+
+        return {
+            'name_totals': self.name_totals.rename('count').rename_axis(['name', 'sex']).reset_index(),
+            'avg_letter_count': letter_df.sort_index().reset_index(),
+            'century_sex_totals': self.century_sex_totals.rename('count').rename_axis(['century', 'sex'])
+                .reset_index(),
+            'century_name_totals': self.century_name_totals.rename('count').rename_axis(['century', 'name'])
+                .reset_index(),
+            'top_names': pd.DataFrame(self.top_names, columns=['year', 'rank', 'name', 'count'])
+                .sort_values(['year', 'rank']).reset_index(drop=True),
+        }
+
+
+def add_totals(totals, new):
+    if totals is None:
+        return new.astype(np.int64)
+
+    return totals.add(new, fill_value=0).astype(np.int64)
+
+
+# Runs a stream of chunks through StreamingAggregates and returns the aggregates
+def aggregate_stream(chunks, top_k=10, ordered_by_year=True):
+    aggregates = StreamingAggregates(top_k, ordered_by_year)
+    for chunk in chunks:
+        aggregates.update(chunk)
+
+    return aggregates.results()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Aggregate raw SSA name files without loading them all at once.')
+    parser.add_argument('source', help='directory of yobYYYY.txt files, or a CSV file')
+    parser.add_argument('--state-file', action='store_true', help='source is a headerless SSA state file')
+    parser.add_argument('--chunksize', type=int, default=500000, help='rows per chunk when reading a CSV file')
+    parser.add_argument('--top', type=int, default=10, help='number of top names to keep for each year')
+    args = parser.parse_args()
+
+    if os.path.isdir(args.source):
+        stream = iter_year_files(args.source)
+    elif args.state_file:
+        stream = iter_csv(args.source, ['state', 'sex', 'year', 'name', 'count'], args.chunksize)
+    else:
+        stream = iter_csv(args.source, chunksize=args.chunksize)
+
+    # The state files are ordered by state, then sex, then year
+    for title, result in aggregate_stream(stream, args.top, ordered_by_year=not args.state_file).items():
+        print('\n{}:'.format(title))
+        print(result)
@@ -0,0 +1,100 @@
+import numpy as np
+
+from loader import frame_from_columns
+
+
+# Rows and distinct names in the national SSA dataset used by main.py (1880-2015)
+REAL_ROWS = 1858689
+REAL_NAMES = 95025
+FIRST_YEAR = 1880
+LAST_YEAR = 2015
+
+# Every name main.py looks up directly, so the analyses run unchanged on synthetic data
+FIXED_NAMES = [
+    'Alec', 'Amanda', 'Andrew', 'Ashley', 'Benjamin', 'Christopher', 'Colby', 'Daniel', 'Daphne', 'David',
+    'Elizabeth', 'Emily', 'Giselle', 'Hannah', 'Jacob', 'James', 'Jennifer', 'Jessica', 'John', 'Joseph',
+    'Joshua', 'Khaleesi', 'Linda', 'Lucy', 'Madelyn', 'Mary', 'Matthew', 'Maverick', 'Michael', 'Nicholas',
+    'Patricia', 'Robert', 'Ryland', 'William',
+]
+
+LETTERS = np.frombuffer(b'abcdefghijklmnopqrstuvwxyz', dtype=np.uint8)
+
+
+# Builds n distinct made-up names: a unique base-26 stem followed by 0-9 random letters
+def synthetic_vocabulary(n, rng):
+    stem_length = max(1, int(np.ceil(np.log(max(n, 2)) / np.log(26))))
+    letters = np.zeros((n, stem_length + 9), dtype=np.uint8)
+
+    codes = np.arange(n)
+    for i in range(stem_length - 1, -1, -1):
+        letters[:, i] = LETTERS[codes % 26]
+        codes //= 26
+
+    lengths = rng.integers(0, 10, n)
+    tail = LETTERS[rng.integers(0, 26, (n, 9))]
+    letters[:, stem_length:] = np.where(np.arange(9) < lengths[:, np.newaxis], tail, 0)
+    letters[:, 0] -= 32  # capitalise
+
+    return letters.view('S{}'.format(stem_length + 9)).ravel().astype(str)
+
+
+# Generates a dataframe shaped like the SSA names data with scale times as many rows as the national data
+# Rows per year grow over time like the real data, counts are heavy-tailed with a minimum of 5, and every
+# (year, sex) block is sorted by count like the SSA files. The frame uses the same compact schema as load_names
+# The vocabulary never grows past the real number of names: above 1x the rows are spread over ceil(scale) made-up
+# states, each holding its share of the national rows, so the frame has a state column like the state-level data
+# and memory grows with the rows rather than with rows times names
+def synthetic_names(scale=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+
+    # np.unique sorts the vocabulary like load_names does and drops made-up names that match a fixed one
+    vocabulary_size = max(int(REAL_NAMES * min(scale, 1)), 2 * len(FIXED_NAMES))
+    names = np.unique(np.concatenate([np.array(FIXED_NAMES),
+                                      synthetic_vocabulary(vocabulary_size - len(FIXED_NAMES), rng)]))
+    n_names = len(names)
+    fixed_codes = np.searchsorted(names, FIXED_NAMES)
+
+    n_states = int(np.ceil(scale)) if scale > 1 else 1
+    years = np.arange(FIRST_YEAR, LAST_YEAR + 1)
+    weights = np.linspace(1, 16, len(years))
+    rows_per_year = np.maximum((weights / weights.sum() * REAL_ROWS * scale / n_states).astype(np.int64),
+                               4 * len(FIXED_NAMES))
+
+    # Blocks in the order of the SSA files: by year then sex nationally, by state, sex then year in the state files
+    if n_states == 1:
+        blocks = [(0, sex, y) for y in range(len(years)) for sex in (0, 1)]
+    else:
+        blocks = [(state, sex, y) for state in range(n_states) for sex in (0, 1) for y in range(len(years))]
+
+    year_blocks, name_blocks, sex_blocks, state_blocks, count_blocks = [], [], [], [], []
+    for state, sex, y in blocks:
+        size = min(int(rows_per_year[y] // 2), n_names)
+        codes = np.union1d(rng.choice(n_names, size - len(FIXED_NAMES), replace=False), fixed_codes)
+        counts = np.maximum(5, rng.lognormal(3, 2, len(codes))).astype(np.int32)
+        counts = np.minimum(counts, 99999)
+
+        by_count = np.argsort(-counts, kind='stable')
+        year_blocks.append(np.full(len(codes), years[y], dtype=np.int16))
+        name_blocks.append(codes[by_count].astype(np.int32))
+        sex_blocks.append(np.full(len(codes), sex, dtype=np.int8))
+        state_blocks.append(np.full(len(codes), state, dtype=np.int8))
+        count_blocks.append(counts[by_count])
+
+    columns = {
+        'year': np.concatenate(year_blocks),
+        'name_codes': np.concatenate(name_blocks),
+        'names': names,
+        'sex_codes': np.concatenate(sex_blocks),
+        'sexes': np.array(['F', 'M']),
+        'count': np.concatenate(count_blocks),
+    }
+    if n_states > 1:
+        columns['state_codes'] = np.concatenate(state_blocks)
+        columns['states'] = np.array(state_labels(n_states))
+
+    return frame_from_columns(columns)
+
+
+# Two-letter labels for made-up states: AA, AB, ...
+def state_labels(n):
+    return [chr(ord('A') + i // 26) + chr(ord('A') + i % 26) for i in range(n)]